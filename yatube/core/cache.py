@@ -0,0 +1,158 @@
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+
+# Как часто и как долго запрос без значения ждёт, пока другой
+# запрос пересчитает его под блокировкой.
+LOCK_POLL_INTERVAL = 0.05
+LOCK_WAIT = 2
+
+
+def version_key(scope):
+    return f'feed-version:{scope}'
+
+
+def new_version():
+    """Начальная версия — текущее время в мс.
+
+    Если ключ версии вытеснен из кэша, новая версия не совпадёт
+    со старой, и устаревшие записи не будут показаны.
+    """
+    return int(time.time() * 1000)
+
+
+def local_timeout(timeout):
+    """Таймаут записи, сброс которой должны увидеть все процессы.
+
+    Без общего кэша (SHARED_CACHE) версии и удаления видит только
+    процесс, сделавший запись, поэтому у остальных запись живёт
+    не дольше LOCAL_CACHE_TIMEOUT секунд.
+    """
+    if settings.SHARED_CACHE:
+        return timeout
+    if timeout is None:
+        return settings.LOCAL_CACHE_TIMEOUT
+    return min(timeout, settings.LOCAL_CACHE_TIMEOUT)
+
+
+def get_versions(scopes):
+    """Текущие версии набора областей одним get_many."""
+    keys = {version_key(scope): scope for scope in scopes}
+    found = default_cache.get_many(keys)
+    missing = {key: new_version() for key in keys if key not in found}
+    if missing:
+        for key, version in missing.items():
+            default_cache.add(key, version, None)
+        found.update(default_cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_versions(scopes):
+    """Делает недействительными все записи указанных областей."""
+    for scope in scopes:
+        try:
+            default_cache.incr(version_key(scope))
+        except ValueError:
+            default_cache.set(version_key(scope), new_version(), None)
+
+
+def tag_page(request, *tags):
+    """Помечает ответ областями, от которых зависит его содержимое.
+
+    По этим меткам PageCacheMiddleware решает, кэшировать ли страницу
+    и когда она устарела. Метка — строка или функция, возвращающая
+    строки: она вызывается, только если страница попадёт в кэш.
+    """
+    if not hasattr(request, 'page_tags'):
+        request.page_tags = set()
+    request.page_tags.update(tags)
+
+
+def collect_tags(request):
+    """Метки страницы из tag_page; функции-метки вызываются один раз."""
+    if not hasattr(request, 'collected_tags'):
+        tags = set()
+        for tag in getattr(request, 'page_tags', ()):
+            if callable(tag):
+                tags.update(tag())
+            else:
+                tags.add(tag)
+        request.collected_tags = tags
+    return request.collected_tags
+
+
+def lock_key(key):
+    return f'lock:{key}'
+
+
+def should_refresh(expires, delta, beta):
+    """Вероятностное досрочное обновление (XFetch).
+
+    Чем ближе срок и чем дольше пересчёт (delta), тем вероятнее, что
+    запрос возьмётся за обновление заранее: запросы не упираются
+    в истёкший ключ одновременно.
+    """
+    gap = -delta * beta * math.log(1 - random.random())
+    return time.time() + gap >= expires
+
+
+def store(key, compute, timeout, cache):
+    """Вычисляет значение и кладёт его в кэш вместе со сроком и delta.
+
+    Ключ живёт на CACHE_STALE_TIMEOUT дольше срока: пока один запрос
+    пересчитывает значение, остальные получают устаревшее.
+    """
+    started = time.time()
+    value = compute()
+    delta = time.time() - started
+    if timeout is None:
+        cache.set(key, (value, math.inf, delta), None)
+    else:
+        cache.set(
+            key,
+            (value, time.time() + timeout, delta),
+            timeout + settings.CACHE_STALE_TIMEOUT,
+        )
+    return value
+
+
+def wait_for(key, cache):
+    """Ждёт значения, которое пересчитывает другой запрос."""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get_or_refresh(key, compute, timeout, cache=None, beta=None):
+    """cache.get_or_set с защитой от одновременного пересчёта.
+
+    Пересчитывает значение только запрос, взявший короткую блокировку
+    (cache.add). Остальные отдают устаревшее значение, а если его
+    нет — недолго ждут результата и лишь потом считают сами.
+    """
+    cache = cache or default_cache
+    if beta is None:
+        beta = settings.CACHE_EARLY_REFRESH_BETA
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        if not should_refresh(expires, delta, beta):
+            return value
+        if not cache.add(lock_key(key), 1, settings.CACHE_LOCK_TIMEOUT):
+            return value
+    elif not cache.add(lock_key(key), 1, settings.CACHE_LOCK_TIMEOUT):
+        entry = wait_for(key, cache)
+        if entry is not None:
+            return entry[0]
+        return store(key, compute, timeout, cache)
+    try:
+        return store(key, compute, timeout, cache)
+    finally:
+        cache.delete(lock_key(key))
@@ -0,0 +1,157 @@
+import pickle
+import zlib
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+
+# Размеры и счётчики — общие для всех экземпляров кэша с одним
+# именем в процессе, как и данные в LocMemCache.
+_sizes = {}
+_stats = {}
+
+PLAIN = b'p'
+COMPRESSED = b'z'
+
+
+class BoundedLocMemCache(LocMemCache):
+    """LocMemCache с ограничением по байтам и сжатием больших значений.
+
+    Параметры OPTIONS:
+    MAX_BYTES — сколько байт значений хранить в процессе; при
+    превышении вытесняются давно не читанные ключи (LRU);
+    COMPRESS_MIN_LENGTH — значения не короче этого размера сжимаются
+    zlib (0 — не сжимать); COMPRESS_LEVEL — уровень сжатия.
+    Значение больше MAX_BYTES не сохраняется.
+    MAX_ENTRIES по-прежнему ограничивает число ключей, но лишний ключ
+    вытесняется по одному, а не третью кэша.
+    """
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        options = params.get('OPTIONS', {})
+        self._max_bytes = int(options.get('MAX_BYTES', 64 * 1024 * 1024))
+        self._compress_min_length = int(
+            options.get('COMPRESS_MIN_LENGTH', 16 * 1024)
+        )
+        self._compress_level = int(options.get('COMPRESS_LEVEL', 6))
+        self._sizes = _sizes.setdefault(name, {})
+        self._stats = _stats.setdefault(name, {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'bytes': 0,
+            'compressed_writes': 0,
+        })
+
+    def _encode(self, value):
+        pickled = pickle.dumps(value, self.pickle_protocol)
+        if (self._compress_min_length
+                and len(pickled) >= self._compress_min_length):
+            packed = zlib.compress(pickled, self._compress_level)
+            if len(packed) < len(pickled):
+                return COMPRESSED + packed
+        return PLAIN + pickled
+
+    @staticmethod
+    def _decode(stored):
+        if stored[:1] == COMPRESSED:
+            return pickle.loads(zlib.decompress(stored[1:]))
+        return pickle.loads(stored[1:])
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        stored = self._encode(value)
+        with self._lock:
+            if self._has_expired(key):
+                self._set(key, stored, timeout)
+                return True
+            return False
+
+    def get(self, key, default=None, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            if self._has_expired(key):
+                self._delete(key)
+                self._stats['misses'] += 1
+                return default
+            stored = self._cache[key]
+            self._cache.move_to_end(key, last=False)
+            self._stats['hits'] += 1
+        return self._decode(stored)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        stored = self._encode(value)
+        with self._lock:
+            self._set(key, stored, timeout)
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        with self._lock:
+            if self._has_expired(key):
+                self._delete(key)
+                raise ValueError("Key '%s' not found" % key)
+            new_value = self._decode(self._cache[key]) + delta
+            self._set(key, self._encode(new_value), self._expire_info[key],
+                      absolute=True)
+        return new_value
+
+    def _set(self, key, value, timeout=DEFAULT_TIMEOUT, absolute=False):
+        self._delete(key)
+        if len(value) > self._max_bytes:
+            return
+        while self._cache and len(self._cache) >= self._max_entries:
+            self._evict()
+        self._cache[key] = value
+        self._cache.move_to_end(key, last=False)
+        self._expire_info[key] = (
+            timeout if absolute else self.get_backend_timeout(timeout)
+        )
+        self._sizes[key] = len(value)
+        self._stats['bytes'] += len(value)
+        if value[:1] == COMPRESSED:
+            self._stats['compressed_writes'] += 1
+        while self._stats['bytes'] > self._max_bytes and len(self._cache) > 1:
+            self._evict()
+
+    def _evict(self):
+        """Вытесняет ключ, который дольше всех не читали."""
+        key, _ = self._cache.popitem()
+        self._forget(key)
+        self._stats['evictions'] += 1
+
+    def _forget(self, key):
+        self._expire_info.pop(key, None)
+        self._stats['bytes'] -= self._sizes.pop(key, 0)
+
+    def _cull(self):
+        self._evict()
+
+    def _delete(self, key):
+        if self._cache.pop(key, None) is not None:
+            self._forget(key)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._expire_info.clear()
+            self._sizes.clear()
+            self._stats['bytes'] = 0
+
+    def stats(self):
+        """Счётчики кэша в этом процессе: для подбора MAX_BYTES."""
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._cache))
+        lookups = stats['hits'] + stats['misses']
+        stats['max_bytes'] = self._max_bytes
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else None
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.update(hits=0, misses=0, evictions=0,
+                               compressed_writes=0)
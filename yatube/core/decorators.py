@@ -0,0 +1,67 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def query_budget(limit):
+    """Объявляет, сколько SQL-запросов может выполнить view.
+
+    Бюджет хранится в атрибуте query_budget функции и проверяется
+    тестами; login_required и другие декораторы на основе
+    functools.wraps его сохраняют.
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def database_condition(state_func):
+    """Условные GET по состоянию из базы, когда кэш не общий.
+
+    Без SHARED_CACHE ConditionalPageMiddleware ETag не ставит: версии
+    меток видит только записавший процесс. Тогда валидаторы строятся
+    по state_func(*args, **kwargs) view — паре (время последнего
+    изменения, ключ), которую одинаково видят все процессы; Http404
+    из state_func отдаётся как обычно. Правки авторов и групп в ней
+    не отражаются, поэтому валидаторы меняются и раз
+    в LOCAL_CACHE_TIMEOUT секунд. Только для анонимов: подписки
+    и форма комментария вошедшего пользователя в состояние не входят.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if (settings.SHARED_CACHE
+                    or request.method not in ('GET', 'HEAD')
+                    or 'messages' in request.COOKIES
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            latest, key = state_func(*args, **kwargs)
+            period = max(settings.LOCAL_CACHE_TIMEOUT, 1)
+            bucket = int(time.time() // period) * period
+            last_modified = max(
+                bucket, int(latest.timestamp()) if latest else 0
+            )
+            raw = ';'.join((
+                request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+                str(latest),
+                str(key),
+                str(bucket),
+            ))
+            etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
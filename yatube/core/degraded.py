@@ -0,0 +1,39 @@
+import threading
+import time
+from time import perf_counter
+
+from django.conf import settings
+
+_lock = threading.Lock()
+_degraded_until = 0.0
+
+
+def enter():
+    """Включает режим деградации на DEGRADED_MODE_DURATION секунд."""
+    global _degraded_until
+    with _lock:
+        _degraded_until = max(
+            _degraded_until, time.monotonic() + settings.DEGRADED_MODE_DURATION
+        )
+
+
+def leave():
+    global _degraded_until
+    with _lock:
+        _degraded_until = 0.0
+
+
+def remaining():
+    """Сколько секунд ещё длится режим деградации (0 — не включён)."""
+    return max(0.0, _degraded_until - time.monotonic())
+
+
+def latency_wrapper(execute, sql, params, many, context):
+    """Обёртка connection.execute_wrapper: медленный запрос к базе
+    включает режим деградации."""
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if perf_counter() - started > settings.DEGRADED_DB_LATENCY:
+            enter()
@@ -0,0 +1,104 @@
+import threading
+from functools import wraps
+from time import perf_counter
+
+from django.core.cache import caches
+from django.template.backends.django import Template
+
+_local = threading.local()
+_installed = False
+_missing = object()
+
+
+class RequestTimings:
+    """Счётчики одного запроса: SQL, шаблоны и кэш."""
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def current():
+    return getattr(_local, 'timings', None)
+
+
+def start():
+    _local.timings = RequestTimings()
+    return _local.timings
+
+
+def stop():
+    _local.timings = None
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """Обёртка connection.execute_wrapper: время и число запросов."""
+    timings = current()
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if timings is not None:
+            timings.sql_count += 1
+            timings.sql_time += perf_counter() - started
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        timings = current()
+        if timings is None:
+            return render(self, *args, **kwargs)
+        timings.template_depth += 1
+        started = perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_time += perf_counter() - started
+    return wrapper
+
+
+def _counted_get(get):
+    @wraps(get)
+    def wrapper(self, key, default=None, version=None):
+        value = get(self, key, _missing, version)
+        timings = current()
+        if timings is not None:
+            if value is _missing:
+                timings.cache_misses += 1
+            else:
+                timings.cache_hits += 1
+        return default if value is _missing else value
+    return wrapper
+
+
+def _counted_get_many(get_many):
+    @wraps(get_many)
+    def wrapper(self, keys, version=None):
+        keys = list(keys)
+        found = get_many(self, keys, version=version)
+        timings = current()
+        if timings is not None:
+            timings.cache_hits += len(found)
+            timings.cache_misses += len(keys) - len(found)
+        return found
+    return wrapper
+
+
+def install():
+    """Один раз оборачивает рендер шаблонов и чтение кэша."""
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    Template.render = _timed_render(Template.render)
+    backend = type(caches['default'])
+    backend.get = _counted_get(backend.get)
+    if 'get_many' in vars(backend):
+        backend.get_many = _counted_get_many(backend.get_many)
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает число SQL-запросов на страницу вошедшего пользователя '
+        'с сессией и пользователем из базы и из кэша.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument('--path', default=reverse('about:author'))
+        parser.add_argument('--username')
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['username']:
+            users = users.filter(username=options['username'])
+        user = users.first()
+        if user is None:
+            raise CommandError('Нет пользователя: запустите seed_data.')
+        modes = (
+            ('база', {
+                'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+                'AUTHENTICATION_BACKENDS': [
+                    'django.contrib.auth.backends.ModelBackend',
+                ],
+            }),
+            ('кэш', {
+                'SHARED_CACHE': True,
+                'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+                'AUTHENTICATION_BACKENDS': [
+                    'users.backends.CachedModelBackend',
+                ],
+            }),
+        )
+        for title, overrides in modes:
+            with override_settings(**overrides):
+                per_request = self.measure(
+                    user, options['path'], options['requests']
+                )
+            self.stdout.write(
+                f'{title}: {per_request:.1f} SQL-запросов на страницу'
+            )
+
+    @staticmethod
+    def measure(user, path, requests):
+        client = Client()
+        client.force_login(user)
+        client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                client.get(path)
+        return len(queries) / requests
@@ -0,0 +1,120 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.db import apply_pragmas
+
+SCHEMA = '''
+CREATE TABLE post (
+    id INTEGER PRIMARY KEY,
+    author_id INTEGER NOT NULL,
+    pub_date REAL NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX post_author_pub_date ON post (author_id, pub_date);
+'''
+
+
+class Worker(threading.Thread):
+    def __init__(self, path, pragmas, deadline, write):
+        super().__init__()
+        self.path = path
+        self.pragmas = pragmas
+        self.deadline = deadline
+        self.write = write
+        self.done = 0
+        self.errors = 0
+
+    def run(self):
+        connection = sqlite3.connect(self.path)
+        apply_pragmas(connection.cursor(), self.pragmas)
+        author_id = 0
+        while time.monotonic() < self.deadline:
+            author_id = (author_id + 1) % 100
+            try:
+                if self.write:
+                    with connection:
+                        connection.execute(
+                            'INSERT INTO post (author_id, pub_date, text) '
+                            'VALUES (?, ?, ?)',
+                            (author_id, time.time(), 'пост' * 50),
+                        )
+                else:
+                    connection.execute(
+                        'SELECT id, text FROM post WHERE author_id = ? '
+                        'ORDER BY pub_date DESC LIMIT 10',
+                        (author_id,),
+                    ).fetchall()
+                self.done += 1
+            except sqlite3.OperationalError:
+                self.errors += 1
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность SQLite со стандартными '
+        'настройками и с прагмами SQLITE_PRAGMAS при конкурентной '
+        'нагрузке.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=50000)
+
+    def handle(self, *args, **options):
+        modes = (
+            ('стандартный', {}),
+            ('боевой', settings.SQLITE_PRAGMAS),
+        )
+        for title, pragmas in modes:
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.prepare(path, pragmas, options['rows'])
+                reads, writes = self.run_load(path, pragmas, options)
+            seconds = options['seconds']
+            self.stdout.write(
+                f'{title:>12}: '
+                f'чтений/с {reads[0] / seconds:10.0f}  '
+                f'записей/с {writes[0] / seconds:8.0f}  '
+                f'ошибок блокировки {reads[1] + writes[1]}'
+            )
+
+    def prepare(self, path, pragmas, rows):
+        connection = sqlite3.connect(path)
+        apply_pragmas(connection.cursor(), pragmas)
+        connection.executescript(SCHEMA)
+        with connection:
+            connection.executemany(
+                'INSERT INTO post (author_id, pub_date, text) '
+                'VALUES (?, ?, ?)',
+                ((i % 100, i, 'пост' * 50) for i in range(rows)),
+            )
+        connection.close()
+
+    def run_load(self, path, pragmas, options):
+        deadline = time.monotonic() + options['seconds']
+        workers = [
+            Worker(path, pragmas, deadline, write=False)
+            for _ in range(options['readers'])
+        ] + [
+            Worker(path, pragmas, deadline, write=True)
+            for _ in range(options['writers'])
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return (
+            [sum(w.done for w in workers if not w.write),
+             sum(w.errors for w in workers if not w.write)],
+            [sum(w.done for w in workers if w.write),
+             sum(w.errors for w in workers if w.write)],
+        )
@@ -0,0 +1,331 @@
+import hashlib
+import json
+import logging
+import math
+import random
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import parse_http_date_safe, quote_etag
+
+from . import degraded, instrumentation
+from .cache import collect_tags, get_versions, local_timeout
+
+timing_logger = logging.getLogger('yatube.timing')
+degraded_logger = logging.getLogger('yatube.degraded')
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class ServerTimingMiddleware:
+    """Замеряет запрос и отдаёт результат в заголовке Server-Timing.
+
+    Замеряется доля запросов SERVER_TIMING_SAMPLE_RATE: число и время
+    SQL-запросов, время рендера шаблонов, попадания и промахи кэша и
+    общее время. Те же данные пишутся одной JSON-строкой в лог
+    yatube.timing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrumentation.install()
+
+    def __call__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+        timings = instrumentation.start()
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(
+                            instrumentation.sql_wrapper
+                        )
+                    )
+                response = self.get_response(request)
+        finally:
+            instrumentation.stop()
+        total = perf_counter() - started
+        response['Server-Timing'] = self.header(timings, total)
+        timing_logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'sql_count': timings.sql_count,
+            'sql_ms': round(timings.sql_time * 1000, 2),
+            'template_ms': round(timings.template_time * 1000, 2),
+            'cache_hits': timings.cache_hits,
+            'cache_misses': timings.cache_misses,
+        }))
+        return response
+
+    @staticmethod
+    def header(timings, total):
+        return ', '.join((
+            f'sql;dur={timings.sql_time * 1000:.2f};'
+            f'desc="{timings.sql_count} queries"',
+            f'tpl;dur={timings.template_time * 1000:.2f}',
+            f'cache;desc="hit={timings.cache_hits} '
+            f'miss={timings.cache_misses}"',
+            f'total;dur={total * 1000:.2f}',
+        ))
+
+
+def path_key(prefix, request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{prefix}:{path}'
+
+
+class ConditionalPageMiddleware:
+    """ETag по версиям меток страницы и Cache-Control по имени URL.
+
+    Метки, собранные tag_page при последнем рендере адреса, хранятся
+    в кэше PAGE_TAGS_TIMEOUT секунд. По ним ETag считается до вызова
+    view, и при совпадении с If-None-Match ответ 304 отдаётся без
+    запросов к базе и рендера. Для вошедшего пользователя в ETag
+    входят его pk и версии user:<pk> и follows:<pk>; во всех ETag —
+    CSRF-cookie, чтобы формы на странице не остались со старым токеном.
+    ETag ставится только при SHARED_CACHE: версии в LocMemCache другие
+    процессы не видят; без него валидаторы ставят сами view
+    (core.decorators.database_condition). Заголовок Cache-Control
+    берётся из CACHE_CONTROL_POLICIES.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.conditional_request(request):
+            return self.add_cache_control(request, self.get_response(request))
+        etag = None
+        tags = cache.get(path_key('page-tags', request))
+        if tags is not None:
+            etag = self.etag(request, tags)
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                response['ETag'] = etag
+                return self.add_cache_control(request, response)
+        response = self.get_response(request)
+        if response.status_code != 200 or response.streaming:
+            return self.add_cache_control(request, response)
+        tags = collect_tags(request)
+        if tags:
+            cache.set(
+                path_key('page-tags', request),
+                sorted(tags),
+                settings.PAGE_TAGS_TIMEOUT,
+            )
+            etag = self.etag(request, tags)
+        if etag is not None:
+            response.setdefault('ETag', etag)
+        return self.add_cache_control(request, response)
+
+    @staticmethod
+    def conditional_request(request):
+        return (
+            settings.SHARED_CACHE
+            and request.method in ('GET', 'HEAD')
+            and 'messages' not in request.COOKIES
+        )
+
+    @staticmethod
+    def etag(request, tags):
+        tags = set(tags)
+        user_id = request.user.pk
+        if user_id is not None:
+            tags.update((f'user:{user_id}', f'follows:{user_id}'))
+        versions = get_versions(tags)
+        raw = ';'.join((
+            str(user_id),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+            *(f'{tag}={versions[tag]}' for tag in sorted(tags)),
+        ))
+        return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+    @staticmethod
+    def add_cache_control(request, response):
+        """Политика из CACHE_CONTROL_POLICIES, если view не задал свою.
+
+        Ответы вошедшим пользователям всегда private.
+        """
+        if response.has_header('Cache-Control'):
+            return response
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                return response
+        policy = settings.CACHE_CONTROL_POLICIES.get(match.view_name)
+        if policy is None:
+            return response
+        policy = dict(policy)
+        if request.user.is_authenticated and policy.pop('public', False):
+            policy['private'] = True
+        patch_cache_control(response, **policy)
+        return response
+
+
+class PageCacheMiddleware:
+    """Кэш целых страниц для анонимных читателей.
+
+    Кэшируются только ответы, которые view пометил через tag_page.
+    Вместе со страницей хранятся версии её меток; если при чтении
+    хотя бы одна версия изменилась (пост, автор или группа на странице
+    были сохранены), страница рендерится заново. PAGE_CACHE_TIMEOUT
+    ограничивает жизнь записи, если версия сменилась во время рендера.
+    Без общего кэша другие процессы о смене версий не узнают, и запись
+    живёт не дольше LOCAL_CACHE_TIMEOUT.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.cacheable_request(request):
+            return self.get_response(request)
+        key = path_key('page', request)
+        entry = cache.get(key)
+        if entry is not None:
+            versions, response = entry
+            if get_versions(versions) == versions:
+                response['X-Page-Cache'] = 'hit'
+                return self.conditional_response(request, response)
+        response = self.get_response(request)
+        tags = collect_tags(request)
+        if tags and self.cacheable_response(request, response):
+            cache.set(
+                key,
+                (get_versions(tags), response),
+                local_timeout(settings.PAGE_CACHE_TIMEOUT),
+            )
+            response['X-Page-Cache'] = 'miss'
+        return response
+
+    @staticmethod
+    def conditional_response(request, response):
+        """304 вместо сохранённой страницы, если у клиента она же."""
+        if settings.SHARED_CACHE or not response.has_header('ETag'):
+            return response
+        return get_conditional_response(
+            request,
+            etag=response['ETag'],
+            last_modified=parse_http_date_safe(
+                response.get('Last-Modified')
+            ),
+            response=response,
+        )
+
+    @staticmethod
+    def cacheable_request(request):
+        return (
+            settings.PAGE_CACHE_ENABLED
+            and request.method in ('GET', 'HEAD')
+            and not request.user.is_authenticated
+            and 'messages' not in request.COOKIES
+        )
+
+    @staticmethod
+    def cacheable_response(request, response):
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get('CSRF_COOKIE_USED')
+        )
+
+
+class DegradedModeMiddleware:
+    """Режим деградации при перегрузке или ошибках базы.
+
+    Режим включается на DEGRADED_MODE_DURATION секунд, если запрос
+    к базе шёл дольше DEGRADED_DB_LATENCY секунд или view упал
+    с OperationalError (база заблокирована или недоступна). Ошибки
+    в самих запросах — IntegrityError, ProgrammingError — режим
+    не включают. Пока он включён, страницы, помеченные tag_page,
+    отдаются из последней удачной анонимной копии с заголовком
+    Warning, не обращаясь к базе, а изменяющие запросы сразу получают
+    503 с Retry-After. Копии хранятся STALE_PAGE_TIMEOUT секунд.
+
+    Стоит до SessionMiddleware: чтение сессии тоже идёт в базу.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if degraded.remaining():
+            if request.method not in SAFE_METHODS:
+                return self.unavailable()
+            stale = self.stale_response(request)
+            if stale is not None:
+                return stale
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(degraded.latency_wrapper)
+                )
+            response = self.get_response(request)
+        if self.keep_stale_copy(request, response):
+            cache.set(
+                path_key('stale-page', request),
+                response,
+                settings.STALE_PAGE_TIMEOUT,
+            )
+        return response
+
+    @staticmethod
+    def keep_stale_copy(request, response):
+        return (
+            collect_tags(request)
+            and request.method == 'GET'
+            and not request.user.is_authenticated
+            and 'messages' not in request.COOKIES
+            and PageCacheMiddleware.cacheable_response(request, response)
+        )
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, OperationalError):
+            return None
+        degraded_logger.warning(
+            'Ошибка базы на %s: %s', request.path, exception
+        )
+        degraded.enter()
+        if request.method in SAFE_METHODS:
+            stale = self.stale_response(request)
+            if stale is not None:
+                return stale
+        return self.unavailable()
+
+    @staticmethod
+    def stale_response(request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        response = cache.get(path_key('stale-page', request))
+        if response is None:
+            return None
+        del response['ETag']
+        del response['Last-Modified']
+        response['Cache-Control'] = 'no-cache'
+        response['Warning'] = '110 - "Response is Stale"'
+        return response
+
+    @staticmethod
+    def unavailable():
+        response = HttpResponse(
+            'Сайт перегружен, попробуйте позже.',
+            status=503,
+            content_type='text/plain; charset=utf-8',
+        )
+        response['Retry-After'] = str(
+            math.ceil(degraded.remaining()) or 1
+        )
+        return response
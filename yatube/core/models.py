@@ -10,3 +10,23 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class CountersMixin:
+    """Не даёт save() затирать счётчики, которые меняются через F().
+
+    При обновлении существующей записи сохраняются все поля, кроме
+    перечисленных в counter_fields.
+    """
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (self.pk is not None and not self._state.adding
+                and kwargs.get('update_fields') is None
+                and not kwargs.get('force_insert')):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+            ]
+        super().save(*args, **kwargs)
@@ -0,0 +1,73 @@
+import time
+from threading import Thread
+
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from core.cache import get_or_refresh, lock_key
+
+
+class GetOrRefreshTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def compute(self, value='новое', delay=0):
+        def compute():
+            self.calls += 1
+            time.sleep(delay)
+            return value
+        return compute
+
+    def test_single_flight_on_miss(self):
+        """При промахе значение пересчитывает только один запрос."""
+        results = []
+        threads = [
+            Thread(target=lambda: results.append(
+                get_or_refresh('key', self.compute(delay=0.2), 60)
+            ))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['новое'] * 5)
+
+    def test_stale_value_while_refreshing(self):
+        """Пока другой запрос пересчитывает ключ, отдаётся старое значение."""
+        cache.set('key', ('старое', time.time() - 1, 0.1), 60)
+        cache.add(lock_key('key'), 1)
+        self.assertEqual(get_or_refresh('key', self.compute(), 60), 'старое')
+        self.assertEqual(self.calls, 0)
+
+    def test_expired_value_is_refreshed(self):
+        """Истёкшее значение пересчитывается и блокировка снимается."""
+        cache.set('key', ('старое', time.time() - 1, 0.1), 60)
+        self.assertEqual(get_or_refresh('key', self.compute(), 60), 'новое')
+        self.assertIsNone(cache.get(lock_key('key')))
+
+    def test_early_refresh(self):
+        """Долгий пересчёт обновляется раньше срока, при beta=0 — нет."""
+        cache.set('key', ('старое', time.time() + 10, 1), 60)
+        self.assertEqual(
+            get_or_refresh('key', self.compute(), 60, beta=0), 'старое'
+        )
+        self.assertEqual(
+            get_or_refresh('key', self.compute(), 60, beta=1000), 'новое'
+        )
+
+    def test_fragment_tag(self):
+        """Тег {% cache %} из fragment_cache кэширует фрагмент."""
+        template = Template(
+            '{% load fragment_cache %}{% cache 60 part key %}'
+            '{{ value }}{% endcache %}'
+        )
+        first = template.render(Context({'key': 1, 'value': 'первый'}))
+        second = template.render(Context({'key': 1, 'value': 'второй'}))
+        third = template.render(Context({'key': 2, 'value': 'второй'}))
+        self.assertEqual(
+            (first, second, third), ('первый', 'первый', 'второй')
+        )
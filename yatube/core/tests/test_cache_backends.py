@@ -0,0 +1,72 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from core.cache_backends import BoundedLocMemCache
+
+User = get_user_model()
+
+
+def make_cache(name, **options):
+    cache = BoundedLocMemCache(name, {'OPTIONS': options})
+    cache.clear()
+    cache.reset_stats()
+    return cache
+
+
+class BoundedLocMemCacheTest(SimpleTestCase):
+    def test_evicts_least_recently_used_by_bytes(self):
+        """При превышении MAX_BYTES вытесняется давно не читанный ключ."""
+        cache = make_cache('lru', MAX_BYTES=3000, COMPRESS_MIN_LENGTH=0)
+        cache.set('a', 'x' * 1000)
+        cache.set('b', 'y' * 1000)
+        cache.get('a')
+        cache.set('c', 'z' * 1000)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertLessEqual(stats['bytes'], 3000)
+        self.assertEqual(stats['entries'], 2)
+
+    def test_large_values_are_compressed(self):
+        """Большие значения хранятся сжатыми и читаются без изменений."""
+        cache = make_cache('zlib', COMPRESS_MIN_LENGTH=1024)
+        html = '<li>пост</li>' * 1000
+        cache.set('page', html)
+        self.assertEqual(cache.get('page'), html)
+        stats = cache.stats()
+        self.assertEqual(stats['compressed_writes'], 1)
+        self.assertLess(stats['bytes'], len(html))
+
+    def test_bytes_follow_overwrites_and_deletes(self):
+        """Размер кэша учитывает перезапись и удаление ключей."""
+        cache = make_cache('bytes', COMPRESS_MIN_LENGTH=0)
+        cache.set('key', 'x' * 100)
+        cache.set('key', 'x' * 10)
+        small = cache.stats()['bytes']
+        cache.delete('key')
+        self.assertLess(small, 100)
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+    def test_hit_ratio_and_incr(self):
+        """Считаются попадания и промахи, incr сохраняет значение."""
+        cache = make_cache('stats')
+        cache.set('counter', 1)
+        self.assertEqual(cache.incr('counter'), 2)
+        self.assertEqual(cache.get('counter'), 2)
+        cache.get('missing')
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+
+class CacheStatsViewTest(TestCase):
+    def test_only_staff_sees_stats(self):
+        """Счётчики кэша отдаются только сотрудникам."""
+        url = '/cache-stats/'
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url)
+        self.assertIn('hit_ratio', response.json()['caches']['default'])
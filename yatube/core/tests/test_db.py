@@ -0,0 +1,27 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.db import configure_sqlite
+
+
+class SqlitePragmasTest(TestCase):
+    def cache_size(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            return cursor.fetchone()[0]
+
+    @override_settings(
+        SQLITE_PRODUCTION=True, SQLITE_PRAGMAS={'cache_size': -1234}
+    )
+    def test_pragmas_applied_in_production_mode(self):
+        """В боевом режиме новое соединение получает прагмы."""
+        configure_sqlite(sender=None, connection=connection)
+        self.assertEqual(self.cache_size(), -1234)
+
+    @override_settings(
+        SQLITE_PRODUCTION=False, SQLITE_PRAGMAS={'cache_size': -4321}
+    )
+    def test_pragmas_skipped_by_default(self):
+        """Без боевого режима настройки соединения не меняются."""
+        configure_sqlite(sender=None, connection=connection)
+        self.assertNotEqual(self.cache_size(), -4321)
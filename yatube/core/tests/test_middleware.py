@@ -0,0 +1,211 @@
+from django.core.cache import cache
+from django.db import IntegrityError, OperationalError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import degraded
+from core.middleware import path_key
+from posts.models import Comment, Follow, Post, User
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        author = User.objects.create_user(username='timed')
+        Post.objects.create(author=author, text='Пост')
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_has_header_and_log(self):
+        """Замеренный запрос получает Server-Timing и строку в логе."""
+        with self.assertLogs('yatube.timing', 'INFO') as logs:
+            response = self.client.get(reverse('posts:index'))
+        header = response['Server-Timing']
+        for metric in ('sql;dur=', 'tpl;dur=', 'cache;desc=', 'total;dur='):
+            with self.subTest(metric=metric):
+                self.assertIn(metric, header)
+        self.assertIn('"sql_count"', logs.output[0])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_is_untouched(self):
+        """Запрос вне выборки не замеряется."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+@override_settings(SHARED_CACHE=True)
+class ConditionalPageTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='etag')
+        cls.reader = User.objects.create_user(username='etag-reader')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_page_is_not_modified(self):
+        """Неизменная страница отдаёт 304 без SQL и рендера."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.revalidate(url, etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('must-revalidate', response['Cache-Control'])
+
+    def test_change_on_page_changes_etag(self):
+        """Новый комментарий и новый пост меняют ETag страниц с ними."""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        index = reverse('posts:index')
+        etags = {url: self.client.get(url)['ETag'] for url in (detail, index)}
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        Post.objects.create(author=self.author, text='Новый пост')
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_user_and_follows(self):
+        """ETag профиля свой у каждого пользователя и у его подписок."""
+        url = reverse('posts:profile', args=[self.author.username])
+        anonymous = self.client.get(url)['ETag']
+        self.client.force_login(self.reader)
+        response = self.client.get(url)
+        self.assertNotEqual(response['ETag'], anonymous)
+        self.assertIn('private', response['Cache-Control'])
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.revalidate(url, response['ETag']).status_code,
+                         200)
+
+    def test_cache_control_policies(self):
+        """Cache-Control задаётся по имени URL."""
+        self.client.force_login(self.reader)
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertIn('no-store', response['Cache-Control'])
+        self.assertFalse(response.has_header('ETag'))
+
+
+@override_settings(SHARED_CACHE=False)
+class DatabaseConditionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='validators')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, url, response):
+        return self.client.get(
+            url,
+            HTTP_IF_NONE_MATCH=response['ETag'],
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+
+    def test_unchanged_page_is_not_modified(self):
+        """Без общего кэша валидаторы строятся по базе, ответ — 304."""
+        for enabled in (True, False):
+            with self.subTest(page_cache=enabled), \
+                    self.settings(PAGE_CACHE_ENABLED=enabled):
+                url = reverse('posts:post_detail', args=[self.post.pk])
+                response = self.client.get(url)
+                self.assertTrue(response.has_header('Last-Modified'))
+                self.assertEqual(
+                    self.revalidate(url, response).status_code, 304
+                )
+
+    def test_logged_in_user_gets_no_database_validators(self):
+        """Страницы вошедшего пользователя валидаторы по базе не получают."""
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_writes_change_validators(self):
+        """Комментарий, новый и удалённый пост меняют валидаторы."""
+        detail = reverse('posts:post_detail', args=[self.post.pk])
+        index = reverse('posts:index')
+        profile = reverse('posts:profile', args=[self.author.username])
+        Comment.objects.create(post=self.post, author=self.author, text='Да')
+        responses = {url: self.client.get(url) for url in (detail, index)}
+        Comment.objects.create(post=self.post, author=self.author, text='Ещё')
+        Post.objects.create(author=self.author, text='Новый пост')
+        for url, response in responses.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.revalidate(url, response).status_code,
+                                 200)
+        response = self.client.get(profile)
+        Post.objects.filter(text='Новый пост').delete()
+        self.assertEqual(self.revalidate(profile, response).status_code, 200)
+
+
+def locked_database(execute, sql, params, many, context):
+    raise OperationalError('database is locked')
+
+
+def broken_constraint(execute, sql, params, many, context):
+    raise IntegrityError('UNIQUE constraint failed')
+
+
+class DegradedModeTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='degraded')
+        cls.post = Post.objects.create(author=cls.author, text='Старый пост')
+
+    def setUp(self):
+        cache.clear()
+        degraded.leave()
+        self.addCleanup(degraded.leave)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def test_database_error_serves_stale_copy(self):
+        """При ошибке базы отдаётся последняя удачная копия страницы."""
+        self.client.get(self.url)
+        cache.delete(path_key('page', RequestFactory().get(self.url)))
+        with self.assertLogs('yatube.degraded', 'WARNING'):
+            with connection.execute_wrapper(locked_database):
+                response = self.client.get(self.url)
+        self.assertContains(response, 'Старый пост')
+        self.assertIn('Response is Stale', response['Warning'])
+        self.assertGreater(degraded.remaining(), 0)
+
+    def test_query_error_does_not_degrade(self):
+        """Ошибка в самом запросе не включает режим деградации."""
+        self.client.get(self.url)
+        cache.delete(path_key('page', RequestFactory().get(self.url)))
+        with connection.execute_wrapper(broken_constraint):
+            with self.assertRaises(IntegrityError):
+                self.client.get(self.url)
+        self.assertEqual(degraded.remaining(), 0)
+
+    def test_page_without_copy_is_unavailable(self):
+        """Без сохранённой копии ошибка базы даёт 503 с Retry-After."""
+        with self.assertLogs('yatube.degraded', 'WARNING'):
+            with connection.execute_wrapper(locked_database):
+                response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 503)
+        self.assertTrue(response.has_header('Retry-After'))
+
+    @override_settings(DEGRADED_DB_LATENCY=0)
+    def test_slow_database_rejects_writes_and_skips_queries(self):
+        """После медленного запроса чтение идёт из копий, запись — 503."""
+        self.client.get(self.url)
+        self.assertGreater(degraded.remaining(), 0)
+        Post.objects.filter(pk=self.post.pk).update(text='Новый текст')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Старый пост')
+        self.client.force_login(self.author)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': 'Запись'}
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(Post.objects.filter(text='Запись').exists())
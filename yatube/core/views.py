@@ -1,4 +1,10 @@
 # core/views.py
+import os
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.http import JsonResponse
 from django.shortcuts import render
 
 
@@ -12,3 +18,13 @@ def csrf_failure(request, reason=''):
 
 def permission_denied(request, exception):
     return render(request, 'core/403.html', status=403)
+
+
+@staff_member_required
+def cache_stats(request):
+    """Счётчики кэшей текущего процесса, у которых есть stats()."""
+    stats = {
+        alias: caches[alias].stats()
+        for alias in settings.CACHES if hasattr(caches[alias], 'stats')
+    }
+    return JsonResponse({'pid': os.getpid(), 'caches': stats})
@@ -0,0 +1,80 @@
+from django.db.models import Max, OuterRef, Subquery
+
+from .models import Comment, Group, Post, User
+from .objects import raise_if_missing
+
+
+def post_scopes(post, *group_ids):
+    """Области лент, в которые попадает пост, и сам пост."""
+    scopes = ['posts', f'author:{post.author_id}', f'post:{post.pk}']
+    for group_id in {post.group_id, *group_ids}:
+        if group_id is not None:
+            scopes.append(f'group:{group_id}')
+    return scopes
+
+
+def post_tags(posts):
+    """Метки страницы по показанным на ней постам.
+
+    post:<id> меняется при правке поста и его комментариев,
+    user:<id> — при правке автора, group-info:<id> — при правке группы.
+    Области лент (author:, group:) сюда не входят: новый пост автора
+    не меняет уже показанные посты.
+    """
+    tags = set()
+    for post in posts:
+        tags.add(f'post:{post.pk}')
+        tags.add(f'user:{post.author_id}')
+        if post.group_id is not None:
+            tags.add(f'group-info:{post.group_id}')
+    return tags
+
+
+def latest_updated(**lookup):
+    """Время последней правки постов по индексу (…, updated)."""
+    return Subquery(
+        Post.objects.filter(**lookup).order_by('-updated')
+        .values('updated')[:1]
+    )
+
+
+def index_state():
+    """Время последней правки или публикации поста.
+
+    Удаление поста тут не видно: его подхватит смена валидатора
+    раз в LOCAL_CACHE_TIMEOUT.
+    """
+    return Post.objects.aggregate(latest=Max('updated'))['latest'], None
+
+
+def group_state(slug):
+    """Последняя правка постов группы и их число (новый, удалённый)."""
+    raise_if_missing(Group, slug=slug)
+    state = Group.objects.filter(slug=slug).annotate(
+        latest=latest_updated(group=OuterRef('pk'))
+    ).values_list('latest', 'posts_count').first()
+    return state or (None, None)
+
+
+def profile_state(username):
+    raise_if_missing(User, username=username)
+    state = User.objects.filter(username=username).annotate(
+        latest=latest_updated(author=OuterRef('pk'))
+    ).values_list('latest', 'profile__posts_count').first()
+    return state or (None, None)
+
+
+def post_state(post_id):
+    """Правка поста, последний комментарий и число комментариев."""
+    raise_if_missing(Post, pk=post_id)
+    state = Post.objects.filter(pk=post_id).annotate(
+        commented=Subquery(
+            Comment.objects.filter(post=OuterRef('pk'))
+            .order_by('-created').values('created')[:1]
+        )
+    ).values_list('updated', 'commented', 'comments_count').first()
+    if state is None:
+        return None, None
+    updated, commented, comments = state
+    dates = [date for date in (updated, commented) if date is not None]
+    return max(dates, default=None), comments
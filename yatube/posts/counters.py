@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+
+from .models import Comment, Group, Post, Profile
+from .objects import forget
+
+User = get_user_model()
+
+
+def change(queryset, field, delta):
+    """Меняет счётчик на delta, не опуская его ниже нуля."""
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_author_posts(author_id, delta):
+    """Меняет счётчик постов автора на delta.
+
+    Если строки счётчиков у пользователя ещё нет, она создаётся
+    с точным значением из базы.
+    """
+    updated = change(
+        Profile.objects.filter(user_id=author_id), 'posts_count', delta
+    )
+    if not updated and delta > 0:
+        Profile.objects.get_or_create(
+            user_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(
+                    author_id=author_id
+                ).count()
+            },
+        )
+
+
+def change_group_posts(group_id, delta):
+    if group_id is not None:
+        change(Group.objects.filter(pk=group_id), 'posts_count', delta)
+        forget(Group, group_id)
+
+
+def change_post_comments(post_id, delta):
+    change(Post.objects.filter(pk=post_id), 'comments_count', delta)
+    forget(Post, post_id)
+
+
+def author_posts_count(user):
+    """Число постов автора из счётчика, без COUNT по posts_post."""
+    try:
+        return user.profile.posts_count
+    except Profile.DoesNotExist:
+        profile, _ = Profile.objects.get_or_create(
+            user=user,
+            defaults={'posts_count': user.posts.count()},
+        )
+        return profile.posts_count
+
+
+def batches(queryset, size):
+    """Первичные ключи queryset порциями по size штук."""
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)[:size]
+        )
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def totals(queryset, field, pks):
+    return dict(
+        queryset.filter(**{f'{field}__in': pks})
+        .values_list(field).annotate(total=Count('pk')).order_by()
+    )
+
+
+def reconcile(queryset, field, expected):
+    """Записывает точные значения счётчика; возвращает исправленные pk."""
+    stale = []
+    for obj in queryset.only('pk', field):
+        total = expected.get(obj.pk, 0)
+        if getattr(obj, field) != total:
+            setattr(obj, field, total)
+            stale.append(obj)
+    queryset.model.objects.bulk_update(stale, [field])
+    return [obj.pk for obj in stale]
+
+
+def reconcile_counters(size=1000, user_model=User, profile_model=Profile,
+                       group_model=Group, post_model=Post,
+                       comment_model=Comment):
+    """Сверяет все счётчики с базой порциями по size строк.
+
+    Модели передаются, чтобы функцию могла вызвать миграция.
+    Возвращает [(модель, исправленные pk), ...].
+    """
+    fixed = []
+    for pks in batches(user_model.objects.all(), size):
+        profile_model.objects.bulk_create(
+            [profile_model(user_id=pk) for pk in pks],
+            ignore_conflicts=True,
+        )
+        fixed.append((profile_model, reconcile(
+            profile_model.objects.filter(pk__in=pks), 'posts_count',
+            totals(post_model.objects, 'author_id', pks),
+        )))
+    for pks in batches(group_model.objects.all(), size):
+        fixed.append((group_model, reconcile(
+            group_model.objects.filter(pk__in=pks), 'posts_count',
+            totals(post_model.objects, 'group_id', pks),
+        )))
+    for pks in batches(post_model.objects.all(), size):
+        fixed.append((post_model, reconcile(
+            post_model.objects.filter(pk__in=pks), 'comments_count',
+            totals(comment_model.objects, 'post_id', pks),
+        )))
+    return fixed
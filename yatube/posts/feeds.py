@@ -0,0 +1,156 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Max, Q
+
+from core.cache import get_or_refresh
+from .models import FeedItem, Follow, Post
+from .timelines import pull_feed
+
+
+def fanout_limit():
+    return settings.FOLLOW_FEED_FANOUT_LIMIT
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Посты авторов, у которых подписчиков больше лимита, не
+    раскладываются: такие авторы читаются в ленту напрямую.
+    """
+    followers = Follow.objects.filter(author_id=post.author_id)
+    if followers.count() > fanout_limit():
+        return
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers.values_list('user_id', flat=True)
+        ],
+        batch_size=settings.FOLLOW_FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'pub_date'
+    )[:settings.FOLLOW_FEED_BACKFILL]
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, post_id=pk, pub_date=pub_date)
+            for pk, pub_date in posts
+        ],
+        batch_size=settings.FOLLOW_FEED_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    cache.delete(pulled_authors_key(user_id))
+
+
+FILL_FEEDS_SQL = '''
+INSERT INTO {feed} (user_id, post_id, pub_date)
+SELECT follow.user_id, post.id, post.pub_date
+FROM {follow} AS follow
+JOIN (
+    SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+        PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+    ) AS position
+    FROM {post}
+    WHERE author_id IN (
+        SELECT author_id FROM {follow} WHERE id > %s AND id <= %s
+    )
+) AS post ON post.author_id = follow.author_id
+WHERE follow.id > %s AND follow.id <= %s AND post.position <= %s
+    AND NOT EXISTS (
+        SELECT 1 FROM {feed} AS item
+        WHERE item.user_id = follow.user_id AND item.post_id = post.id
+    )
+'''
+
+
+def fill_feeds(feed_model=FeedItem, follow_model=Follow, post_model=Post):
+    """Заполняет ленты всех подписок, как backfill_feed, но одним
+    INSERT ... SELECT на FOLLOW_FEED_BATCH_SIZE подписок.
+
+    Модели передаются, чтобы функцию могла вызвать миграция.
+    Возвращает число подписок.
+    """
+    quote = connection.ops.quote_name
+    sql = FILL_FEEDS_SQL.format(
+        feed=quote(feed_model._meta.db_table),
+        follow=quote(follow_model._meta.db_table),
+        post=quote(post_model._meta.db_table),
+    )
+    last_id = follow_model.objects.aggregate(last=Max('pk'))['last'] or 0
+    size = settings.FOLLOW_FEED_BATCH_SIZE
+    with connection.cursor() as cursor:
+        for start in range(0, last_id, size):
+            end = start + size
+            cursor.execute(
+                sql, [start, end, start, end, settings.FOLLOW_FEED_BACKFILL]
+            )
+    return follow_model.objects.count()
+
+
+def trim_feed(user_id, author_id):
+    """Убирает из ленты посты автора, от которого пользователь отписался."""
+    FeedItem.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+    cache.delete(pulled_authors_key(user_id))
+
+
+def pulled_authors_key(user_id):
+    return f'follow-feed-pulled:{user_id}'
+
+
+def pulled_authors(user):
+    """Авторы из подписок, чьи посты читаются в ленту напрямую.
+
+    Берутся авторы, у которых подписчиков больше половины лимита
+    раскладки: так пост не потеряется, если число подписчиков
+    колеблется у границы.
+    """
+    def compute():
+        followed = Follow.objects.filter(user=user).values('author_id')
+        return list(
+            Follow.objects.filter(author_id__in=followed)
+            .values('author_id')
+            .annotate(followers=Count('pk'))
+            .filter(followers__gt=fanout_limit() // 2)
+            .values_list('author_id', flat=True)
+        )
+    return get_or_refresh(
+        pulled_authors_key(user.pk),
+        compute,
+        settings.FOLLOW_FEED_PULLED_TIMEOUT,
+    )
+
+
+def fanout_feed(user):
+    """Лента из материализованной таблицы FeedItem.
+
+    Без авторов-знаменитостей это одно чтение по индексу
+    (user, pub_date); их посты добавляются условием по автору.
+    """
+    authors = pulled_authors(user)
+    if not authors:
+        return Post.objects.filter(feed_items__user=user).select_related(
+            'author', 'group'
+        ).order_by('-feed_items__pub_date', '-feed_items__pk')
+    return Post.objects.filter(
+        Q(pk__in=FeedItem.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=authors)
+    ).select_related('author', 'group').order_by('-pub_date', '-pk')
+
+
+def follow_feed(user):
+    """Лента подписок пользователя, движок задаёт FOLLOW_FEED_ENGINE."""
+    engine = settings.FOLLOW_FEED_ENGINE
+    if engine == 'fanout':
+        return fanout_feed(user)
+    if engine == 'pull':
+        return pull_feed(user)
+    return Post.objects.filter(
+        author__following__user=user
+    ).select_related('author', 'group')
@@ -0,0 +1,50 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from time import perf_counter
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.models import Post
+from posts.thumbnails import generate
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт миниатюры всех картинок постов пулом процессов '
+        '(по умолчанию по процессу на ядро). С --force пересоздаёт '
+        'уже существующие.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--chunk-size', type=int, default=16)
+        parser.add_argument('--force', action='store_true')
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        names = list(
+            Post.objects.exclude(image='').order_by('image')
+            .values_list('image', flat=True).distinct()
+        )
+        task = partial(generate, force=options['force'])
+        if options['workers'] > 1:
+            # Дочерние процессы не должны унаследовать открытые соединения.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=options['workers'], initializer=django.setup
+            ) as executor:
+                results = list(executor.map(
+                    task, names, chunksize=options['chunk_size']
+                ))
+        else:
+            results = [task(name) for name in names]
+        failed = [(name, error) for name, error in results if error]
+        for name, error in failed:
+            self.stderr.write(f'{name}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Картинок: {len(names)}, ошибок: {len(failed)} '
+            f'за {perf_counter() - started:.2f} с'
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.feeds import fill_feeds
+from posts.models import FeedItem
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает материализованные ленты подписок (FeedItem).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Не очищать таблицу лент перед заполнением.',
+        )
+
+    def handle(self, *args, **options):
+        if not options['keep']:
+            FeedItem.objects.all().delete()
+        total = fill_feeds()
+        self.stdout.write(
+            self.style.SUCCESS(f'Заполнены ленты для {total} подписок.')
+        )
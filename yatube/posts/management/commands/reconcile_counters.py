@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import reconcile_counters
+from posts.objects import ALIASES, forget
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет и сверяет денормализованные счётчики: посты автора, '
+        'посты группы и комментарии поста.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fixed = 0
+        for model, pks in reconcile_counters(options['batch_size']):
+            if model in ALIASES:
+                forget(model, *pks)
+            fixed += len(pks)
+        self.stdout.write(self.style.SUCCESS(f'Исправлено счётчиков: {fixed}'))
@@ -0,0 +1,226 @@
+import random
+import re
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+WORDS = (
+    'яндекс практикум джанго пост лента группа автор подписка кэш '
+    'индекс запрос страница шаблон база данных сервер python код тест'
+).split()
+
+
+@contextmanager
+def manual_dates(*fields):
+    """Позволяет задать даты полям с auto_now_add при bulk_create."""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def zipf_weights(count, exponent):
+    """Накопленные веса закона Ципфа для rng.choices(cum_weights=...)."""
+    return list(accumulate(1 / (rank + 1) ** exponent
+                           for rank in range(count)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными для замеров: пользователи, '
+        'группы, посты, комментарии и подписки со степенным '
+        'распределением. При одном и том же --seed данные одинаковы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=200000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Префикс имён пользователей и слагов групп.',
+        )
+        parser.add_argument(
+            '--skip-feeds', action='store_true',
+            help='Не пересобирать материализованные ленты подписок.',
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prefix = options['prefix']
+        self.started = timezone.now() - timedelta(days=options['days'])
+        self.span = timedelta(days=options['days'])
+        self.check_prefix()
+        with transaction.atomic(), manual_dates(
+            Post._meta.get_field('pub_date'),
+            Comment._meta.get_field('created'),
+        ):
+            users = self.step('пользователи', self.create_users,
+                              options['users'])
+            groups = self.step('группы', self.create_groups,
+                               options['groups'])
+            posts = self.step('посты', self.create_posts,
+                              options['posts'], users, groups)
+            self.step('комментарии', self.create_comments,
+                      options['comments'], users, posts)
+            self.step('подписки', self.create_follows,
+                      options['follows'], users)
+        self.step('счётчики', call_command, 'reconcile_counters',
+                  stdout=self.stdout)
+        if (settings.FOLLOW_FEED_ENGINE == 'fanout'
+                and not options['skip_feeds']):
+            self.step('ленты подписок', call_command,
+                      'rebuild_follow_feeds', keep=True, stdout=self.stdout)
+
+    def check_prefix(self):
+        """Останавливает повторный прогон с тем же --prefix.
+
+        Имена пользователей и слаги групп уникальны: без проверки
+        вставка упала бы с IntegrityError уже после части работы.
+        """
+        prefix = re.escape(self.prefix)
+        if (User.objects.filter(username__regex=rf'^{prefix}\d+$').exists()
+                or Group.objects.filter(
+                    slug__regex=rf'^{prefix}-\d+$').exists()):
+            raise CommandError(
+                f'В базе уже есть данные с префиксом {self.prefix!r}: '
+                f'задайте другой --prefix.'
+            )
+
+    def step(self, title, func, *args, **kwargs):
+        started = perf_counter()
+        result = func(*args, **kwargs)
+        self.stdout.write(f'{title}: {perf_counter() - started:.1f} с')
+        return result
+
+    def bulk(self, model, objects):
+        """Вставляет объекты порциями по batch_size."""
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) == self.batch_size:
+                model.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch)
+
+    def new_ids(self, model, last_id):
+        return list(
+            model.objects.filter(pk__gt=last_id).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+
+    def last_id(self, model):
+        return model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+
+    def text(self, words):
+        return ' '.join(self.rng.choices(WORDS, k=words)).capitalize()
+
+    def moment(self, index, total):
+        """Даты растут вместе с id, как в живой базе."""
+        return self.started + self.span * (index / max(total, 1))
+
+    def create_users(self, count):
+        last_id = self.last_id(User)
+        password = make_password('password')
+        self.bulk(User, (
+            User(
+                username=f'{self.prefix}{i}',
+                first_name=self.text(1),
+                last_name=self.text(1),
+                password=password,
+            )
+            for i in range(count)
+        ))
+        ids = self.new_ids(User, last_id)
+        self.rng.shuffle(ids)
+        return ids
+
+    def create_groups(self, count):
+        last_id = self.last_id(Group)
+        self.bulk(Group, (
+            Group(
+                title=f'{self.text(2)} {self.prefix}{i}',
+                slug=f'{self.prefix}-{i}',
+                description=self.text(12),
+            )
+            for i in range(count)
+        ))
+        return self.new_ids(Group, last_id)
+
+    def create_posts(self, count, users, groups):
+        last_id = self.last_id(Post)
+        authors = zipf_weights(len(users), 1.1)
+        group_weights = zipf_weights(len(groups), 1.0) if groups else None
+
+        def posts():
+            for i in range(count):
+                group_id = None
+                if groups and self.rng.random() < 0.7:
+                    group_id = self.rng.choices(
+                        groups, cum_weights=group_weights
+                    )[0]
+                yield Post(
+                    author_id=self.rng.choices(users, cum_weights=authors)[0],
+                    group_id=group_id,
+                    text=self.text(self.rng.randint(5, 60)),
+                    pub_date=self.moment(i, count),
+                )
+        self.bulk(Post, posts())
+        return self.new_ids(Post, last_id)
+
+    def create_comments(self, count, users, posts):
+        if not posts:
+            return
+        self.bulk(Comment, (
+            Comment(
+                post_id=self.rng.choice(posts),
+                author_id=self.rng.choice(users),
+                text=self.text(self.rng.randint(3, 20)),
+                created=self.moment(i, count),
+            )
+            for i in range(count)
+        ))
+
+    def create_follows(self, average, users):
+        """Подписки со степенным распределением числа подписчиков."""
+        weights = zipf_weights(len(users), 1.0)
+
+        def follows():
+            for user_id in users:
+                wanted = int(self.rng.expovariate(1 / average))
+                authors = set(self.rng.choices(
+                    users, cum_weights=weights, k=wanted
+                ))
+                authors.discard(user_id)
+                for author_id in sorted(authors):
+                    yield Follow(user_id=user_id, author_id=author_id)
+        if average and len(users) > 1:
+            self.bulk(Follow, follows())
@@ -0,0 +1,35 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from posts.warmup import warm_caches
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэши: первые страницы главной, крупнейшие группы '
+        'и профили с наибольшим числом подписчиков. LocMemCache у каждого '
+        'процесса свой — для рабочих процессов включите '
+        'WARM_CACHES_ON_STARTUP.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=3)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--profiles', type=int, default=10)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        started = perf_counter()
+        results = warm_caches(
+            pages=options['pages'],
+            groups=options['groups'],
+            profiles=options['profiles'],
+            workers=options['workers'],
+        )
+        for url, status, seconds in results:
+            self.stdout.write(f'{seconds * 1000:8.1f} мс  {status}  {url}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето адресов: {len(results)} '
+            f'за {perf_counter() - started:.2f} с'
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-18 13:52
+
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_counters(apps, schema_editor):
+    """Счётчики для постов, групп и комментариев, созданных до них."""
+    from posts.counters import reconcile_counters
+    reconcile_counters(
+        user_model=apps.get_model(*settings.AUTH_USER_MODEL.split('.')),
+        profile_model=apps.get_model('posts', 'Profile'),
+        group_model=apps.get_model('posts', 'Group'),
+        post_model=apps.get_model('posts', 'Post'),
+        comment_model=apps.get_model('posts', 'Comment'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0009_feeditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+            bases=(core.models.CountersMixin, models.Model),
+        ),
+        migrations.AddField(
+            model_name='group',
+            name='posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
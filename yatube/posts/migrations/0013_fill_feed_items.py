@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def fill_feed_items(apps, schema_editor):
+    """Ленты подписок, созданных до появления FeedItem."""
+    from posts.feeds import fill_feeds
+    fill_feeds(
+        apps.get_model('posts', 'FeedItem'),
+        apps.get_model('posts', 'Follow'),
+        apps.get_model('posts', 'Post'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_updated'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_feed_items, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,187 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.fields.files import FieldFile
+from django.http import Http404
+
+from core.cache import local_timeout
+
+from .models import Group, Post
+
+User = get_user_model()
+
+# Отметка в кэше: такого объекта в базе нет (см. NEGATIVE_CACHE_TIMEOUT).
+MISSING = False
+
+# Модели в кэше объектов и поле, по которому их ищут кроме pk.
+ALIASES = {
+    Post: None,
+    User: 'username',
+    Group: 'slug',
+}
+
+
+def object_key(model, pk):
+    return f'object:{model._meta.label_lower}:{pk}'
+
+
+def alias_key(model, value):
+    return f'object:{model._meta.label_lower}:{ALIASES[model]}:{value}'
+
+
+def dump(obj):
+    """Значения полей без связанных объектов: их кэш хранит отдельно."""
+    values = []
+    for field in obj._meta.concrete_fields:
+        value = getattr(obj, field.attname)
+        if isinstance(value, FieldFile):
+            value = value.name
+        values.append(value)
+    return tuple(values)
+
+
+def load(model, values):
+    return model.from_db(
+        DEFAULT_DB_ALIAS,
+        [field.attname for field in model._meta.concrete_fields],
+        values,
+    )
+
+
+def remember(*objects):
+    """Кладёт объекты в кэш вместе с загруженными select_related.
+
+    Ключи синонимов (username, slug) хранят только pk. Сигналы
+    сбрасывают записи только в своём процессе, поэтому без общего
+    кэша они живут не дольше LOCAL_CACHE_TIMEOUT.
+    """
+    entries = {}
+    pending = list(objects)
+    while pending:
+        obj = pending.pop()
+        if obj is None or type(obj) not in ALIASES:
+            continue
+        model = type(obj)
+        entries[object_key(model, obj.pk)] = dump(obj)
+        if ALIASES[model]:
+            entries[alias_key(model, getattr(obj, ALIASES[model]))] = obj.pk
+        pending.extend(obj._state.fields_cache.values())
+    cache.set_many(entries, local_timeout(settings.OBJECT_CACHE_TIMEOUT))
+
+
+def forget(model, *pks):
+    """Убирает объекты из кэша; синонимы проверяются при чтении."""
+    cache.delete_many([object_key(model, pk) for pk in pks])
+
+
+def forget_instance(obj):
+    """Убирает объект и отметки об отсутствии его pk и синонима."""
+    model = type(obj)
+    keys = [object_key(model, obj.pk)]
+    if ALIASES[model]:
+        keys.append(alias_key(model, getattr(obj, ALIASES[model])))
+    cache.delete_many(keys)
+
+
+def get_many(model, pks, queryset=None):
+    """Объекты по pk: из кэша одним get_many, промахи — одним запросом.
+
+    queryset (например, с select_related) используется для промахов.
+    """
+    keys = {object_key(model, pk): pk for pk in pks}
+    found = {
+        keys[key]: load(model, values)
+        for key, values in cache.get_many(keys).items()
+        if values is not MISSING
+    }
+    missing = [pk for pk in keys.values() if pk not in found]
+    if missing:
+        if queryset is None:
+            queryset = model.objects.all()
+        loaded = queryset.in_bulk(missing)
+        remember(*loaded.values())
+        found.update(loaded)
+    return found
+
+
+def attach_relations(posts):
+    """Подставляет постам авторов и группы из кэша объектов."""
+    authors = get_many(User, {post.author_id for post in posts})
+    groups = get_many(
+        Group, {post.group_id for post in posts if post.group_id is not None}
+    )
+    for post in posts:
+        post.author = authors[post.author_id]
+        post.group = groups.get(post.group_id)
+    return posts
+
+
+def get_posts(pks):
+    """Посты с авторами и группами в порядке pks."""
+    posts = get_many(
+        Post, pks, Post.objects.select_related('author', 'group')
+    )
+    return attach_relations([posts[pk] for pk in pks if pk in posts])
+
+
+def not_found(model):
+    return Http404(f'{model._meta.object_name} не найден')
+
+
+def lookup_key(model, field, value):
+    if field == 'pk':
+        return object_key(model, value)
+    if field == ALIASES[model]:
+        return alias_key(model, value)
+    raise ValueError(f'{model.__name__} не кэшируется по полю {field}')
+
+
+def from_cache(model, field, value):
+    """Объект из кэша или None; Http404, если отмечено его отсутствие."""
+    pk = value if field == 'pk' else cache.get(alias_key(model, value))
+    if pk is MISSING:
+        raise not_found(model)
+    values = cache.get(object_key(model, pk)) if pk is not None else None
+    if values is MISSING:
+        raise not_found(model)
+    if values is None:
+        return None
+    obj = load(model, values)
+    if field != 'pk' and getattr(obj, field) != value:
+        return None
+    return obj
+
+
+def raise_if_missing(model, **lookup):
+    """Http404 без запроса к базе, если отсутствие объекта отмечено."""
+    (field, value), = lookup.items()
+    from_cache(model, field, value)
+
+
+def cached_object_or_404(queryset, **lookup):
+    """get_object_or_404 через кэш объектов.
+
+    lookup — pk или поле-синоним модели (username, slug). При промахе
+    объект загружается queryset (с его select_related) и кэшируется;
+    у поста из кэша автор и группа тоже берутся из кэша. Отсутствие
+    объекта запоминается на NEGATIVE_CACHE_TIMEOUT секунд, чтобы
+    перебор несуществующих адресов не доходил до базы.
+    """
+    if isinstance(queryset, type):
+        queryset = queryset._default_manager.all()
+    model = queryset.model
+    (field, value), = lookup.items()
+    key = lookup_key(model, field, value)
+    obj = from_cache(model, field, value)
+    if obj is not None:
+        if model is Post:
+            attach_relations([obj])
+        return obj
+    try:
+        obj = queryset.get(**lookup)
+    except model.DoesNotExist:
+        cache.set(key, MISSING, local_timeout(settings.NEGATIVE_CACHE_TIMEOUT))
+        raise not_found(model)
+    remember(obj)
+    return obj
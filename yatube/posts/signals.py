@@ -0,0 +1,166 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_out
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.cache import bump_versions
+from . import counters, feeds, objects, thumbnails, timelines
+from .cache import post_scopes
+from .models import Comment, Follow, Group, Post, Profile
+
+User = get_user_model()
+
+
+def fanout_enabled():
+    return settings.FOLLOW_FEED_ENGINE == 'fanout'
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    instance._old_group_id = None
+    if instance.pk is not None:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Post)
+def remember_new_image(sender, instance, **kwargs):
+    """Загруженная картинка ещё не сохранена в хранилище (_committed)."""
+    image = instance.image
+    instance._new_image = bool(image) and not image._committed
+
+
+@receiver(post_save, sender=Post)
+def generate_thumbnails(sender, instance, raw=False, **kwargs):
+    if instance._new_image and not raw:
+        name = instance.image.name
+        transaction.on_commit(
+            lambda: thumbnails.generate_in_background(name)
+        )
+
+
+@receiver(post_save, sender=Post)
+def invalidate_feeds_on_save(sender, instance, **kwargs):
+    bump_versions(post_scopes(instance, instance._old_group_id))
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_feeds_on_delete(sender, instance, **kwargs):
+    bump_versions(post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance, **kwargs):
+    bump_versions([f'post:{instance.post_id}'])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance, **kwargs):
+    bump_versions([f'group:{instance.pk}', f'group-info:{instance.pk}'])
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_versions([f'user:{instance.pk}'])
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follows(sender, instance, **kwargs):
+    bump_versions([f'follows:{instance.user_id}'])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_object(sender, instance, **kwargs):
+    objects.forget_instance(instance)
+
+
+@receiver(user_logged_out)
+def forget_logged_out_user(sender, user, **kwargs):
+    if user is not None:
+        objects.forget(User, user.pk)
+
+
+def clear_cache_after_migrate(sender, **kwargs):
+    """После migrate и flush кэш объектов и страниц не соответствует базе.
+
+    Подключается в PostsConfig.ready только для приложения posts.
+    """
+    cache.clear()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        counters.change_author_posts(instance.author_id, 1)
+        counters.change_group_posts(instance.group_id, 1)
+    elif instance._old_group_id != instance.group_id:
+        counters.change_group_posts(instance._old_group_id, -1)
+        counters.change_group_posts(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    counters.change_author_posts(instance.author_id, -1)
+    counters.change_group_posts(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        counters.change_post_comments(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    counters.change_post_comments(instance.post_id, -1)
+
+
+@receiver(post_save, sender=User)
+def create_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Profile.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created and fanout_enabled():
+        feeds.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+def forget_post_timelines(sender, instance, created, **kwargs):
+    if created:
+        timelines.forget_timelines(instance)
+    elif instance._old_group_id != instance.group_id:
+        timelines.forget_timelines(instance, instance._old_group_id)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post_timelines(sender, instance, **kwargs):
+    timelines.forget_timelines(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_follower_feed(sender, instance, created, **kwargs):
+    if created and fanout_enabled():
+        feeds.backfill_feed(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_follower_feed(sender, instance, **kwargs):
+    if fanout_enabled():
+        feeds.trim_feed(instance.user_id, instance.author_id)
@@ -0,0 +1,60 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.cache import get_versions, local_timeout
+from ..thumbnails import prefetched
+
+register = template.Library()
+
+CARD_TEMPLATE = 'includes/post_card.html'
+
+
+def card_scopes(post):
+    scopes = [f'user:{post.author_id}']
+    if post.group_id is not None:
+        scopes.append(f'group-info:{post.group_id}')
+    return scopes
+
+
+def card_key(post, variant, versions):
+    """Ключ карточки: пост, время его правки и версии автора и группы."""
+    related = '.'.join(str(versions[scope]) for scope in card_scopes(post))
+    return (
+        f'post-card:{variant}:{post.pk}:'
+        f'{post.updated.timestamp()}:{related}'
+    )
+
+
+@register.simple_tag
+def post_cards(posts, variant='index'):
+    """HTML карточек постов ленты, собранный из кэша одним get_many.
+
+    Отсутствующие карточки рендерятся по includes/post_card.html
+    (записи о миниатюрах их картинок загружаются одним get_many)
+    и сохраняются одним set_many. Версии автора и группы без общего
+    кэша видит только записавший процесс, поэтому тогда карточка живёт
+    не дольше LOCAL_CACHE_TIMEOUT. Использование:
+    {% post_cards page_obj 'index' as cards %}
+    """
+    posts = list(posts)
+    versions = get_versions(
+        {scope for post in posts for scope in card_scopes(post)}
+    )
+    keys = [card_key(post, variant, versions) for post in posts]
+    cards = cache.get_many(keys)
+    to_render = [
+        (key, post) for key, post in zip(keys, posts) if key not in cards
+    ]
+    missing = {}
+    with prefetched([post.image for _, post in to_render]):
+        for key, post in to_render:
+            missing[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'variant': variant}
+            )
+    if missing:
+        cache.set_many(missing, local_timeout(settings.POST_CARD_TIMEOUT))
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
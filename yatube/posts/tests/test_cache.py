@@ -1,8 +1,10 @@
 from django.core.cache import cache
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Post, User
+from posts.models import Comment, Group, Post, User
+from posts.templatetags.post_cards import post_cards
+from posts.utils import POSTS_PER_PAGE
 
 
 class CacheTests(TestCase):
@@ -15,16 +17,190 @@ class CacheTests(TestCase):
             author=cls.author,
         )
 
+    def setUp(self):
+        cache.clear()
+
     def test_pages_uses_correct_template(self):
         """Кэширование данных на странице index."""
         response = self.client.get(reverse('posts:index'))
         cached_response_content = response.content
-        Post.objects.create(
-            text='Второй пост',
-            author=self.author,
-        )
+        Post.objects.filter(pk=self.post.pk).update(text='Изменён в обход')
         response_2 = self.client.get(reverse('posts:index'))
         self.assertEqual(cached_response_content, response_2.content)
         cache.clear()
         response_3 = self.client.get(reverse('posts:index'))
         self.assertNotEqual(cached_response_content, response_3.content)
+
+    def test_new_post_invalidates_index(self):
+        """Новый пост сразу сбрасывает кэш главной страницы."""
+        self.client.get(reverse('posts:index'))
+        Post.objects.create(text='Второй пост', author=self.author)
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Второй пост')
+
+    def test_pages_are_cached_separately(self):
+        """Каждая страница ленты кэшируется под своим ключом."""
+        Post.objects.bulk_create(
+            Post(text=f'Пост номер {i}', author=self.author)
+            for i in range(POSTS_PER_PAGE)
+        )
+        first = self.client.get(reverse('posts:index'))
+        second = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertNotContains(first, 'Тестовый пост')
+        self.assertContains(second, 'Тестовый пост')
+
+    def test_group_change_invalidates_both_groups(self):
+        """Перенос поста в другую группу сбрасывает кэш обеих групп."""
+        old_group = Group.objects.create(
+            title='Старая', slug='old', description='Старая группа'
+        )
+        new_group = Group.objects.create(
+            title='Новая', slug='new', description='Новая группа'
+        )
+        post = Post.objects.create(
+            text='Переезжающий пост', author=self.author, group=old_group
+        )
+        old_url = reverse('posts:group_list', args=[old_group.slug])
+        new_url = reverse('posts:group_list', args=[new_group.slug])
+        self.assertContains(self.client.get(old_url), post.text)
+        self.assertNotContains(self.client.get(new_url), post.text)
+        post.group = new_group
+        post.save()
+        self.assertNotContains(self.client.get(old_url), post.text)
+        self.assertContains(self.client.get(new_url), post.text)
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='page-cache')
+        cls.group = Group.objects.create(
+            title='Группа', slug='page-cache', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост в группе', author=cls.author, group=cls.group
+        )
+        cls.other = Post.objects.create(text='Другой пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url):
+        return self.client.get(url)
+
+    def test_anonymous_page_served_from_cache(self):
+        """Повторный запрос анонима отдаётся из кэша без SQL."""
+        url = reverse('posts:index')
+        self.assertEqual(self.get(url)['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(0):
+            response = self.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    @override_settings(SHARED_CACHE=False, LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_bounds_page_timeout(self):
+        """Без общего кэша страница живёт не дольше LOCAL_CACHE_TIMEOUT."""
+        url = reverse('posts:index')
+        self.get(url)
+        self.assertEqual(self.get(url)['X-Page-Cache'], 'miss')
+
+    def test_post_save_invalidates_pages_with_post(self):
+        """Правка поста сбрасывает страницы, на которых он показан."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.get(url)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        self.assertContains(self.get(url), 'Исправленный пост')
+
+    def test_comment_invalidates_post_detail(self):
+        """Новый комментарий сбрасывает страницу поста."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        self.assertContains(self.get(url), 'Комментарий')
+
+    def test_group_save_invalidates_group_page(self):
+        """Правка группы сбрасывает её страницу."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.get(url)
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertContains(self.get(url), 'Новое название')
+
+    def test_author_and_group_changes_reach_feeds(self):
+        """Новое имя автора и слаг группы видны в лентах сразу."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:profile', args=[self.author.username]),
+        )
+        for url in urls:
+            self.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Переименованный'
+        author.save()
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed-group'
+        group.save()
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.get(url)
+                self.assertContains(response, 'Переименованный')
+                self.assertContains(response, '/group/renamed-group/')
+
+    def test_unrelated_post_keeps_page(self):
+        """Правка другого поста не сбрасывает страницу поста."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        self.get(url)
+        Comment.objects.create(
+            post=self.other, author=self.author, text='Комментарий'
+        )
+        self.assertEqual(self.get(url)['X-Page-Cache'], 'hit')
+
+    def test_authorized_user_is_not_cached(self):
+        """Страницы авторизованных пользователей не кэшируются."""
+        self.client.force_login(self.author)
+        url = reverse('posts:index')
+        self.get(url)
+        self.assertFalse(self.get(url).has_header('X-Page-Cache'))
+
+
+class PostCardTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='card', first_name='Лев', last_name='Толстой'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(text='Карточка', author=self.author)
+
+    def cards(self):
+        posts = Post.objects.select_related('author', 'group')
+        return ''.join(post_cards(posts, 'index'))
+
+    def test_card_cached_until_post_updated(self):
+        """Карточка берётся из кэша, пока пост не изменён через save()."""
+        self.assertIn('Карточка', self.cards())
+        Post.objects.filter(pk=self.post.pk).update(text='В обход')
+        self.assertIn('Карточка', self.cards())
+        self.post.text = 'Исправлено'
+        self.post.save()
+        self.assertIn('Исправлено', self.cards())
+
+    @override_settings(SHARED_CACHE=False, LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_bounds_card_timeout(self):
+        """Без общего кэша карточка живёт не дольше LOCAL_CACHE_TIMEOUT."""
+        self.assertIn('Лев Толстой', self.cards())
+        User.objects.filter(pk=self.author.pk).update(first_name='Алексей')
+        self.assertIn('Алексей Толстой', self.cards())
+
+    def test_author_change_refreshes_card(self):
+        """Правка автора сбрасывает его карточки."""
+        self.assertIn('Лев Толстой', self.cards())
+        self.author.first_name = 'Алексей'
+        self.author.save()
+        self.assertIn('Алексей Толстой', self.cards())
@@ -1,8 +1,12 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Comment, Follow, Group, Post
+from posts.models import Comment, FeedItem, Follow, Group, Post
 
 User = get_user_model()
 
@@ -94,6 +98,17 @@ class FollowViewTest(TestCase):
         response = self.authorized_client.get(reverse('posts:follow_index'))
         self.assertIn(post, response.context['page_obj'].object_list)
 
+    def test_follow_shows_posts_at_once(self):
+        """Посты нового автора сразу видны на странице подписок."""
+        self.authorized_client.get(reverse('posts:follow_index'))
+        following = User.objects.create(username='followed-later')
+        Post.objects.create(author=following, text='Пост нового автора')
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[following.username])
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'Пост нового автора')
+
     def test_new_post_unfollow(self):
         """Новая запись пользователя не появляется в ленте тех, кто на него не
         подписан."""
@@ -108,3 +123,115 @@ class FollowViewTest(TestCase):
             self.post.text,
             response.context['page_obj'].object_list
         )
+
+
+class FanoutFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='writer')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.other_reader = User.objects.create_user(username='other_reader')
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow_feed_posts(self):
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост попадает в материализованные ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.follow_feed_posts(), [post])
+
+    def test_follow_backfills_and_unfollow_trims(self):
+        """Подписка добавляет старые посты в ленту, отписка убирает."""
+        post = Post.objects.create(author=self.author, text='Старый пост')
+        self.reader_client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertEqual(self.follow_feed_posts(), [post])
+        self.reader_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(FeedItem.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.follow_feed_posts(), [])
+
+    @override_settings(FOLLOW_FEED_BACKFILL=2)
+    def test_rebuild_fills_latest_posts_of_each_follow(self):
+        """Пересборка кладёт в ленту последние посты каждого автора."""
+        posts = [
+            Post.objects.create(author=self.author, text=f'Пост {i}')
+            for i in range(3)
+        ]
+        Follow.objects.create(user=self.reader, author=self.author)
+        FeedItem.objects.all().delete()
+        call_command('rebuild_follow_feeds', stdout=StringIO())
+        self.assertEqual(
+            set(FeedItem.objects.filter(user=self.reader)
+                .values_list('post_id', flat=True)),
+            {posts[1].pk, posts[2].pk},
+        )
+        call_command('rebuild_follow_feeds', '--keep', stdout=StringIO())
+        self.assertEqual(FeedItem.objects.count(), 2)
+
+    @override_settings(FOLLOW_FEED_FANOUT_LIMIT=1)
+    def test_popular_author_is_pulled(self):
+        """Посты авторов с большим числом подписчиков читаются напрямую."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.other_reader, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        self.assertIn(post, self.follow_feed_posts())
+
+
+@override_settings(FOLLOW_FEED_ENGINE='pull')
+class PullFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'writer{i}') for i in range(3)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def follow_feed_posts(self, page=1):
+        response = self.reader_client.get(
+            reverse('posts:follow_index'), {'page': page}
+        )
+        return list(response.context['page_obj'])
+
+    def test_merged_feed_order(self):
+        """Слияние списков авторов даёт ту же ленту, что и запрос к базе."""
+        for i in range(15):
+            Post.objects.create(author=self.authors[i % 3], text=f'Пост {i}')
+        expected = list(
+            Post.objects.filter(author__following__user=self.reader)
+            .order_by('-pub_date', '-pk')
+        )
+        self.assertEqual(
+            self.follow_feed_posts(1) + self.follow_feed_posts(2), expected
+        )
+
+    def test_cached_timeline_follows_writes(self):
+        """Закэшированные списки обновляются при создании и удалении."""
+        old = Post.objects.create(author=self.authors[0], text='Старый')
+        self.assertEqual(self.follow_feed_posts(), [old])
+        new = Post.objects.create(author=self.authors[1], text='Новый')
+        self.assertEqual(self.follow_feed_posts(), [new, old])
+        old.delete()
+        self.assertEqual(self.follow_feed_posts(), [new])
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Comment, Group, Post
 
 User = get_user_model()
 
@@ -32,3 +35,74 @@ class PostModelTest(TestCase):
         group = PostModelTest.group
         expected_object_name = group.title
         self.assertEquals(expected_object_name, str(group))
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='counted')
+        cls.group = Group.objects.create(
+            title='Группа', slug='counted', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа', slug='other', description='Описание'
+        )
+
+    def refresh(self):
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+
+    def test_post_counters(self):
+        """Счётчики постов следуют за созданием, переносом и удалением."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        self.refresh()
+        self.assertEqual(self.user.profile.posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.other_group
+        post.save()
+        self.refresh()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.refresh()
+        self.assertEqual(self.user.profile.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_counter_survives_post_save(self):
+        """Сохранение старой копии поста не затирает счётчик комментариев."""
+        post = Post.objects.create(author=self.user, text='Пост')
+        Comment.objects.create(post=post, author=self.user, text='Ответ')
+        post.text = 'Изменённый пост'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+    def test_counters_do_not_go_below_zero(self):
+        """Удаление при отстающих счётчиках не нарушает CHECK >= 0."""
+        post, = Post.objects.bulk_create(
+            [Post(author=self.user, text='Пост', group=self.group)]
+        )
+        post = Post.objects.get(text='Пост')
+        comment, = Comment.objects.bulk_create(
+            [Comment(post=post, author=self.user, text='Ответ')]
+        )
+        Comment.objects.get(text='Ответ').delete()
+        post.delete()
+        self.refresh()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.user.profile.posts_count, 0)
+
+    def test_reconcile_counters(self):
+        """Команда reconcile_counters исправляет разошедшиеся счётчики."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text='Пост', group=self.group)
+            for _ in range(3)
+        )
+        call_command('reconcile_counters', batch_size=1, stdout=StringIO())
+        self.refresh()
+        self.assertEqual(self.user.profile.posts_count, 3)
+        self.assertEqual(self.group.posts_count, 3)
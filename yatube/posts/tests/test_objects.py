@@ -0,0 +1,132 @@
+from django.core.cache import cache
+from django.http import Http404
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Comment, Group, Post, User
+from ..objects import cached_object_or_404, get_many, get_posts
+
+
+class ObjectCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='objects')
+        cls.group = Group.objects.create(
+            title='Группа', slug='objects', description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+
+    def test_hot_post_served_without_query(self):
+        """Повторный поиск поста с автором и группой идёт без SQL."""
+        cached_object_or_404(
+            Post.objects.select_related('author', 'group'), pk=self.post.pk
+        )
+        with self.assertNumQueries(0):
+            post = cached_object_or_404(Post, pk=self.post.pk)
+            self.assertEqual(post.author.username, 'objects')
+            self.assertEqual(post.group.slug, 'objects')
+
+    @override_settings(SHARED_CACHE=False, LOCAL_CACHE_TIMEOUT=0)
+    def test_local_cache_bounds_object_timeout(self):
+        """Без общего кэша объект живёт не дольше LOCAL_CACHE_TIMEOUT."""
+        cached_object_or_404(Post, pk=self.post.pk)
+        Post.objects.filter(pk=self.post.pk).update(text='Из другого процесса')
+        self.assertEqual(
+            cached_object_or_404(Post, pk=self.post.pk).text,
+            'Из другого процесса',
+        )
+
+    def test_lookup_by_alias(self):
+        """Пользователь и группа находятся по username и slug из кэша."""
+        cached_object_or_404(User, username='objects')
+        cached_object_or_404(Group, slug='objects')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                cached_object_or_404(User, username='objects'), self.author
+            )
+            self.assertEqual(
+                cached_object_or_404(Group, slug='objects'), self.group
+            )
+
+    def test_renamed_user_not_found_by_old_name(self):
+        """Старый username после переименования даёт 404."""
+        user = User.objects.create_user(username='old-name')
+        cached_object_or_404(User, username='old-name')
+        user.username = 'new-name'
+        user.save()
+        with self.assertRaises(Http404):
+            cached_object_or_404(User, username='old-name')
+        self.assertEqual(
+            cached_object_or_404(User, username='new-name').pk, user.pk
+        )
+
+    def test_save_and_counters_invalidate(self):
+        """save() и изменение счётчиков убирают пост из кэша."""
+        cached_object_or_404(Post, pk=self.post.pk)
+        self.post.text = 'Исправлено'
+        self.post.save()
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+        post = cached_object_or_404(Post, pk=self.post.pk)
+        self.assertEqual(post.text, 'Исправлено')
+        self.assertEqual(post.comments_count, 1)
+
+    def test_get_many_loads_misses_in_one_query(self):
+        """get_many догружает промахи одним запросом и кэширует их."""
+        other = Post.objects.create(text='Другой', author=self.author)
+        get_many(Post, [self.post.pk])
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                set(get_many(Post, [self.post.pk, other.pk])),
+                {self.post.pk, other.pk},
+            )
+        get_posts([self.post.pk])
+        with self.assertNumQueries(0):
+            posts = get_posts([other.pk, self.post.pk])
+        self.assertEqual([post.pk for post in posts], [other.pk, self.post.pk])
+
+
+class NegativeCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='negative')
+
+    def assert_missing_without_query(self, queryset, **lookup):
+        with self.assertRaises(Http404):
+            cached_object_or_404(queryset, **lookup)
+        with self.assertNumQueries(0), self.assertRaises(Http404):
+            cached_object_or_404(queryset, **lookup)
+
+    def test_missing_objects_remembered(self):
+        """Повторный поиск несуществующего объекта не идёт в базу."""
+        self.assert_missing_without_query(Post, pk=1000)
+        self.assert_missing_without_query(User, username='nobody')
+        self.assert_missing_without_query(Group, slug='nothing')
+
+    def test_created_objects_found(self):
+        """Созданный объект сразу находится, несмотря на отметку."""
+        self.assert_missing_without_query(User, username='late')
+        self.assert_missing_without_query(Group, slug='late')
+        user = User.objects.create_user(username='late')
+        group = Group.objects.create(
+            title='Поздняя', slug='late', description='Описание'
+        )
+        self.assertEqual(cached_object_or_404(User, username='late'), user)
+        self.assertEqual(cached_object_or_404(Group, slug='late'), group)
+        self.assert_missing_without_query(Post, pk=500)
+        post = Post.objects.create(pk=500, text='Пост', author=self.author)
+        self.assertEqual(cached_object_or_404(Post, pk=500), post)
+
+    def test_missing_profile_page(self):
+        """Страница несуществующего профиля отдаёт 404 без запроса."""
+        url = reverse('posts:profile', args=['ghost'])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,160 @@
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Post, User
+from ..utils import (POSTS_PER_PAGE, CachedCountPaginator, CursorPage,
+                     NoCountPaginator, elided_page_range)
+
+POSTS_COUNT = POSTS_PER_PAGE * 2 + 3
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='cursor')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author)
+            for i in range(POSTS_COUNT)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_cursor_walks_whole_feed(self):
+        """Курсоры next обходят всю ленту без пропусков и повторов."""
+        seen = []
+        cursor = ''
+        while cursor is not None:
+            response = self.guest_client.get(
+                reverse('posts:index'), {'cursor': cursor}
+            )
+            page_obj = response.context['page_obj']
+            self.assertIsInstance(page_obj, CursorPage)
+            seen.extend(post.pk for post in page_obj)
+            cursor = page_obj.next_cursor
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_same_page(self):
+        """Курсор previous возвращает на предыдущую страницу."""
+        url = reverse('posts:profile', args=[self.author.username])
+        first = self.guest_client.get(url, {'cursor': ''})
+        second = self.guest_client.get(
+            url, {'cursor': first.context['page_obj'].next_cursor}
+        )
+        back = self.guest_client.get(
+            url, {'cursor': second.context['page_obj'].previous_cursor}
+        )
+        self.assertEqual(
+            list(back.context['page_obj']),
+            list(first.context['page_obj']),
+        )
+        self.assertFalse(back.context['page_obj'].has_previous())
+
+    def test_broken_cursor_shows_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'garbage'}
+        )
+        self.assertEqual(len(response.context['page_obj']), POSTS_PER_PAGE)
+        self.assertFalse(response.context['page_obj'].has_previous())
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_page_links_still_work_in_cursor_mode(self):
+        """Старые ссылки ?page=N работают и в курсорном режиме."""
+        response = self.guest_client.get(reverse('posts:index'), {'page': 3})
+        page_obj = response.context['page_obj']
+        self.assertNotIsInstance(page_obj, CursorPage)
+        self.assertEqual(page_obj.number, 3)
+        self.assertEqual(len(page_obj), POSTS_COUNT - POSTS_PER_PAGE * 2)
+
+
+class CountModeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='counter')
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=cls.author)
+            for i in range(POSTS_COUNT)
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    @override_settings(POSTS_COUNT_MODE='none')
+    def test_no_count_mode_skips_count_query(self):
+        """В режиме без подсчёта лента не выполняет COUNT(*)."""
+        url = reverse('posts:index')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, {'page': 2})
+        self.assertFalse(
+            any('COUNT(' in query['sql'] for query in queries)
+        )
+        page_obj = response.context['page_obj']
+        self.assertIsInstance(page_obj.paginator, NoCountPaginator)
+        self.assertEqual(len(page_obj), POSTS_PER_PAGE)
+        self.assertTrue(page_obj.has_next())
+        self.assertTrue(page_obj.has_previous())
+        last = self.guest_client.get(url, {'page': 3}).context['page_obj']
+        self.assertFalse(last.has_next())
+        self.assertEqual(len(last), POSTS_COUNT - POSTS_PER_PAGE * 2)
+
+    @override_settings(POSTS_COUNT_MODE='none')
+    def test_no_count_mode_out_of_range_page(self):
+        """Несуществующая страница без подсчёта открывает первую."""
+        response = self.guest_client.get(reverse('posts:index'), {'page': 99})
+        self.assertEqual(response.context['page_obj'].number, 1)
+
+    @override_settings(POSTS_COUNT_MODE='cached')
+    def test_cached_count_mode_reuses_count(self):
+        """В режиме кэша COUNT(*) выполняется один раз на таймаут."""
+        url = reverse('posts:index')
+        first = self.guest_client.get(url).context['page_obj']
+        self.assertIsInstance(first.paginator, CachedCountPaginator)
+        self.assertEqual(first.paginator.count, POSTS_COUNT)
+        Post.objects.create(text='Новый пост', author=self.author)
+        second = self.guest_client.get(url).context['page_obj']
+        self.assertEqual(second.paginator.count, POSTS_COUNT)
+
+
+class ElidedPageRangeTests(TestCase):
+    def test_window_around_current_page(self):
+        """Показываются края ленты и окно вокруг текущей страницы."""
+        paginator = Paginator(range(POSTS_PER_PAGE * 50000), POSTS_PER_PAGE)
+        self.assertEqual(
+            elided_page_range(paginator.page(25000)),
+            [1, None, 24998, 24999, 25000, 25001, 25002, None, 50000],
+        )
+
+    def test_short_gap_is_not_elided(self):
+        """Пропуск в одну страницу показывается номером, а не многоточием."""
+        paginator = Paginator(range(POSTS_PER_PAGE * 10), POSTS_PER_PAGE)
+        self.assertEqual(
+            elided_page_range(paginator.page(4)),
+            [1, 2, 3, 4, 5, 6, None, 10],
+        )
+
+    def test_no_count_page_range(self):
+        """Без подсчёта последняя страница не показывается."""
+        paginator = NoCountPaginator(
+            list(range(POSTS_PER_PAGE * 10)), POSTS_PER_PAGE
+        )
+        self.assertEqual(
+            elided_page_range(paginator.page(7)),
+            [1, None, 5, 6, 7, 8],
+        )
+
+    def test_page_range_in_context(self):
+        """Окно страниц передаётся в контекст ленты."""
+        response = Client().get(reverse('posts:index'))
+        self.assertEqual(response.context['page_range'], [1])
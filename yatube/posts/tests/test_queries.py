@@ -0,0 +1,68 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..utils import POSTS_PER_PAGE
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов страниц не зависит от числа постов на них."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        authors = [
+            User.objects.create_user(username=f'author{i}')
+            for i in range(POSTS_PER_PAGE)
+        ]
+        cls.author = authors[0]
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+            Post.objects.create(author=author, text='Пост', group=cls.group)
+            Post.objects.create(author=cls.author, text='Пост автора')
+        cls.post = Post.objects.filter(author=cls.author).first()
+        Comment.objects.bulk_create(
+            Comment(post=cls.post, author=author, text='Комментарий')
+            for author in authors
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def assert_within_budget(self, client, url):
+        view = resolve(url).func
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(queries), view.query_budget,
+            '\n'.join(query['sql'] for query in queries),
+        )
+
+    def test_public_views_within_budget(self):
+        """Публичные страницы укладываются в объявленный бюджет."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assert_within_budget(self.guest_client, url)
+
+    def test_follow_index_within_budget(self):
+        """Лента подписок укладывается в объявленный бюджет."""
+        self.assert_within_budget(
+            self.reader_client, reverse('posts:follow_index')
+        )
@@ -0,0 +1,101 @@
+import re
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, User
+from ..utils import CURSOR_NEXT, CURSOR_PREVIOUS, encode_cursor
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?\w+( AS \w+)?$')
+TEMP_SORT = 'USE TEMP B-TREE'
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц читают данные по индексам, без полного
+    просмотра таблиц и без сортировки во временном B-дереве."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def explain(self, sql, params=None):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_plans_use_indexes(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.reader_client.get(url)
+        for query in queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            for step in self.explain(query['sql']):
+                with self.subTest(url=url, sql=query['sql'], step=step):
+                    self.assertIsNone(FULL_SCAN.search(step))
+                    self.assertNotIn(TEMP_SORT, step)
+
+    def test_feed_plans(self):
+        """Ленты и страница поста не сканируют таблицы целиком."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?cursor=',
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            self.assert_plans_use_indexes(url)
+
+    def test_deep_cursor_bounds_index_range(self):
+        """Курсор в глубине ленты ищет по диапазону индекса, а не
+        просматривает его с начала.
+
+        План строится с параметрами, как при реальном запросе: с
+        подставленными значениями SQLite выбирает другой план.
+        """
+        executed = []
+
+        def collect(execute, sql, params, many, context):
+            executed.append((sql, params))
+            return execute(sql, params, many, context)
+
+        for direction, bound in ((CURSOR_NEXT, '(pub_date<?)'),
+                                 (CURSOR_PREVIOUS, '(pub_date>?)')):
+            url = (reverse('posts:index') + '?cursor='
+                   + encode_cursor(direction, self.post))
+            executed.clear()
+            with connection.execute_wrapper(collect):
+                self.reader_client.get(url)
+            steps = [
+                step
+                for sql, params in executed
+                if '"pub_date" <' in sql or '"pub_date" >' in sql
+                for step in self.explain(sql, params)
+                if 'posts_post' in step
+            ]
+            with self.subTest(direction=direction):
+                self.assertTrue(steps)
+                for step in steps:
+                    self.assertTrue(step.startswith('SEARCH'), step)
+                    self.assertIn(bound, step)
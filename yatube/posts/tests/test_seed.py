@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Comment, FeedItem, Follow, Group, Post, User
+
+
+def seed(**options):
+    call_command(
+        'seed_data', users=30, groups=3, posts=200, comments=100,
+        follows=5, days=30, stdout=StringIO(), **options,
+    )
+
+
+class SeedDataTest(TestCase):
+    def test_creates_requested_volume(self):
+        """Команда создаёт заданное число записей и пересчитывает счётчики."""
+        seed(seed=1)
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        follow = Follow.objects.first()
+        self.assertEqual(
+            FeedItem.objects.filter(user=follow.user_id,
+                                    post__author=follow.author_id).count(),
+            follow.author.posts.count(),
+        )
+        post = Post.objects.order_by('-comments_count').first()
+        self.assertEqual(post.comments_count, post.comments.count())
+        group = Group.objects.first()
+        self.assertEqual(group.posts_count, group.posts.count())
+
+    def test_keeps_existing_feeds(self):
+        """Второй прогон с другим префиксом не трогает готовые ленты."""
+        seed(seed=1)
+        items = set(FeedItem.objects.values_list('pk', flat=True))
+        seed(seed=1, prefix='more')
+        self.assertLess(
+            items, set(FeedItem.objects.values_list('pk', flat=True))
+        )
+
+    def test_same_prefix_is_rejected(self):
+        """Повторный прогон с тем же префиксом останавливается с ошибкой."""
+        seed(seed=1)
+        posts = Post.objects.count()
+        with self.assertRaises(CommandError):
+            seed(seed=2)
+        self.assertEqual(Post.objects.count(), posts)
+
+    def test_same_seed_gives_same_data(self):
+        """При одном --seed данные воспроизводятся."""
+        def snapshot():
+            return (
+                list(Post.objects.order_by('pk').values_list(
+                    'author__username', 'group__slug', 'text')),
+                sorted(Follow.objects.values_list(
+                    'user__username', 'author__username')),
+            )
+        seed(seed=7)
+        first = snapshot()
+        for model in (Follow, Comment, Post, Group, User):
+            model.objects.all().delete()
+        seed(seed=7)
+        self.assertEqual(snapshot(), first)
+
+    def test_dates_follow_ids(self):
+        """Даты постов растут вместе с id, как в живой базе."""
+        seed(seed=2, skip_feeds=True)
+        dates = list(Post.objects.order_by('pk').values_list(
+            'pub_date', flat=True))
+        self.assertEqual(dates, sorted(dates))
+        self.assertFalse(FeedItem.objects.exists())
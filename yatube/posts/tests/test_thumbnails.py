@@ -0,0 +1,99 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from unittest import skipUnless
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.images import ImageFile
+
+from ..models import Post, User
+from ..thumbnails import THUMBNAILS, generate, prefetched, thumbnail_file
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+# sorl-thumbnail 12.7 масштабирует через Image.ANTIALIAS, которого нет
+# в Pillow 10+ (в requirements.txt закреплён Pillow 8.3.1).
+RESIZE_SUPPORTED = hasattr(Image, 'ANTIALIAS')
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='painter')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def upload(self, name='small.gif'):
+        return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+    def test_create_post_saves_image(self):
+        """Картинка из формы создания поста сохраняется."""
+        self.client.force_login(self.author)
+        self.client.post(
+            reverse('posts:post_create'),
+            {'text': 'С картинкой', 'image': self.upload()},
+        )
+        post = Post.objects.get(text='С картинкой')
+        self.assertTrue(post.image.name.startswith('posts/small'))
+
+    @skipUnless(RESIZE_SUPPORTED, 'sorl-thumbnail 12.7 требует Pillow < 10')
+    def test_generate_creates_every_size(self):
+        """generate создаёт миниатюры всех размеров из шаблонов."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', image=self.upload()
+        )
+        self.assertEqual(generate(post.image.name), (post.image.name, None))
+        thumbnails = default.kvstore.get_thumbnails(ImageFile(post.image))
+        self.assertEqual(len(thumbnails), len(THUMBNAILS))
+        for thumbnail in thumbnails:
+            self.assertTrue(thumbnail.exists())
+
+    def test_command_reports_missing_files(self):
+        """Команда сообщает о картинках, которых нет в хранилище, и
+        обрабатывает общую картинку нескольких постов один раз."""
+        for text in ('Битый', 'Копия'):
+            Post.objects.create(
+                author=self.author, text=text, image='posts/missing.gif'
+            )
+        output, errors = StringIO(), StringIO()
+        call_command(
+            'generate_thumbnails', workers=1, stdout=output, stderr=errors
+        )
+        self.assertIn('Картинок: 1, ошибок: 1', output.getvalue())
+        self.assertIn('posts/missing.gif', errors.getvalue())
+
+    def test_prefetched_thumbnails_skip_cache_and_database(self):
+        """После prefetched миниатюры берутся из памяти, без кэша и SQL."""
+        post = Post.objects.create(
+            author=self.author, text='Пост', image=self.upload()
+        )
+        geometry, options = THUMBNAILS[0]
+        thumbnail = thumbnail_file(post.image, geometry, options)
+        thumbnail.set_size((960, 339))
+        default.kvstore._set(thumbnail.key, thumbnail)
+        with prefetched([post.image]):
+            cache.clear()
+            with self.assertNumQueries(0):
+                found = get_thumbnail(post.image, geometry, **options)
+        self.assertEqual(found.url, thumbnail.url)
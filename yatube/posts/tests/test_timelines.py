@@ -0,0 +1,80 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..models import Group, Post, User
+from ..timelines import author_timeline, group_timeline, timeline_key
+
+
+class CachedTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='timeline')
+        cls.group = Group.objects.create(
+            title='Группа', slug='timeline', description='Описание'
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая', slug='timeline-other', description='Описание'
+        )
+        for i in range(7):
+            Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def expected(self, **lookup):
+        return list(
+            Post.objects.filter(**lookup).order_by('-pub_date', '-pk')
+            .values_list('pk', flat=True)
+        )
+
+    def pks(self, posts):
+        return [post.pk for post in posts]
+
+    def test_warm_page_without_queries(self):
+        """Страница ленты автора из кэша не обращается к базе."""
+        self.pks(author_timeline(self.author, 7)[0:5])
+        with self.assertNumQueries(0):
+            posts = author_timeline(self.author, 7)[0:5]
+        self.assertEqual(
+            self.pks(posts), self.expected(author=self.author)[:5]
+        )
+
+    @override_settings(GROUP_TIMELINE_SIZE=3)
+    def test_deep_page_read_from_database(self):
+        """Страница за пределами списка читается из базы."""
+        timeline = group_timeline(Group.objects.get(pk=self.group.pk))
+        self.assertEqual(len(timeline.timeline), 3)
+        self.assertEqual(
+            self.pks(timeline[3:6]), self.expected(group=self.group)[3:6]
+        )
+
+    def test_new_post_resets_lists(self):
+        """Новый пост сбрасывает списки автора и группы, а не правит их."""
+        group_timeline(self.group)
+        author_timeline(self.author, 7)
+        post = Post.objects.create(
+            text='Новый', author=self.author, group=self.group
+        )
+        self.assertIsNone(cache.get(timeline_key('group', self.group.pk)))
+        self.assertIsNone(cache.get(timeline_key('author', self.author.pk)))
+        self.assertEqual(self.pks(group_timeline(self.group)[0:1]), [post.pk])
+        self.assertEqual(
+            self.pks(author_timeline(self.author, 8)[0:1]), [post.pk]
+        )
+        post.delete()
+        self.assertNotIn(post.pk, self.pks(group_timeline(self.group)[0:10]))
+
+    def test_moved_post_changes_group_lists(self):
+        """Перенос поста в другую группу обновляет списки обеих групп."""
+        group_timeline(self.group)
+        group_timeline(self.other_group)
+        post = Post.objects.filter(group=self.group).first()
+        post.group = self.other_group
+        post.save()
+        self.assertNotIn(post.pk, self.pks(group_timeline(self.group)[0:10]))
+        self.assertEqual(
+            self.pks(group_timeline(self.other_group)[0:10]), [post.pk]
+        )
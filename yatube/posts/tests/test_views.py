@@ -2,6 +2,7 @@ import tempfile
 import shutil
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
@@ -30,6 +31,7 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()  # Создаем неавторизованный клиент
         self.authorized_client = Client()  # Создаем второй клиент
         self.authorized_client.force_login(PostPagesTests.author)
@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post, User
+from ..warmup import warm_caches, warm_targets
+
+
+class WarmCachesTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.star = User.objects.create_user(username='star')
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.star)
+        self.big = Group.objects.create(
+            title='Большая', slug='big', description='Описание'
+        )
+        Group.objects.create(title='Малая', slug='small', description='')
+        for i in range(3):
+            Post.objects.create(text=f'Пост {i}', author=self.star,
+                                group=self.big)
+
+    def test_targets(self):
+        """Прогреваются главная, крупнейшие группы и популярные профили."""
+        self.assertEqual(
+            warm_targets(pages=2, groups=1, profiles=1),
+            [
+                reverse('posts:index'),
+                reverse('posts:index') + '?page=2',
+                reverse('posts:group_list', args=['big']),
+                reverse('posts:profile', args=['star']),
+            ],
+        )
+
+    def test_pages_served_from_cache_after_warm_up(self):
+        """После прогрева страницы отдаются из кэша."""
+        results = warm_caches(pages=1, groups=1, profiles=1, workers=2)
+        self.assertEqual([status for _, status, _ in results], [200] * 3)
+        for url, _, _ in results:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'hit')
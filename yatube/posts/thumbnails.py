@@ -0,0 +1,125 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections
+from sorl.thumbnail import default, delete, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+
+logger = logging.getLogger('yatube.thumbnails')
+
+# Миниатюры, которые запрашивают шаблоны ({% thumbnail post.image ... %}):
+# при изменении размеров в шаблонах поправьте и здесь.
+THUMBNAILS = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+_executor = None
+_prefetched = threading.local()
+
+
+def generate(name, force=False):
+    """Создаёт все миниатюры картинки; force — пересоздать заново.
+
+    Возвращает (имя, текст ошибки или None).
+    """
+    try:
+        if not default_storage.exists(name):
+            return name, 'файл не найден'
+        if force:
+            delete(name, delete_file=False)
+        for geometry, options in THUMBNAILS:
+            get_thumbnail(name, geometry, **options)
+    except Exception as error:
+        logger.exception('Не удалось создать миниатюры %s', name)
+        return name, str(error)
+    finally:
+        connections.close_all()
+    return name, None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails',
+        )
+    return _executor
+
+
+def generate_in_background(name):
+    """Создаёт миниатюры в фоновом потоке, не задерживая запрос."""
+    return executor().submit(generate, name)
+
+
+def thumbnail_file(source, geometry, options):
+    """ImageFile миниатюры без обращения к хранилищу и KVStore.
+
+    Имя строится так же, как в ThumbnailBackend.get_thumbnail.
+    """
+    backend = default.backend
+    source = ImageFile(source)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(
+        backend._get_thumbnail_filename(source, geometry, options),
+        default.storage,
+    )
+
+
+@contextmanager
+def prefetched(images):
+    """Загружает записи KVStore о миниатюрах картинок одним get_many.
+
+    Внутри блока {% thumbnail %} для этих картинок берёт записи
+    из памяти и не обращается ни к кэшу, ни к базе.
+    """
+    keys = [
+        add_prefix(thumbnail_file(image, geometry, options).key)
+        for image in images if image
+        for geometry, options in THUMBNAILS
+    ]
+    found = default.kvstore.cache.get_many(keys) if keys else {}
+    _prefetched.values = {
+        key: value for key, value in found.items()
+        if value != cached_db_kvstore.EMPTY_VALUE
+    }
+    try:
+        yield
+    finally:
+        _prefetched.values = {}
+
+
+class PrefetchingKVStore(cached_db_kvstore.KVStore):
+    """KVStore sorl в кэше с запасной копией в базе (cached_db), который
+    отдаёт записи, загруженные заранее в prefetched."""
+
+    def _get_raw(self, key):
+        value = getattr(_prefetched, 'values', {}).get(key)
+        if value is not None:
+            return value
+        return super()._get_raw(key)
+
+    def _set_raw(self, key, value):
+        getattr(_prefetched, 'values', {}).pop(key, None)
+        super()._set_raw(key, value)
+
+    def _delete_raw(self, *keys):
+        for key in keys:
+            getattr(_prefetched, 'values', {}).pop(key, None)
+        super()._delete_raw(*keys)
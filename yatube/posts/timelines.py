@@ -0,0 +1,161 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Post
+from .objects import get_posts
+
+
+def timeline_key(field, owner_id):
+    return f'timeline:{field}:{owner_id}'
+
+
+def timeline_size(field):
+    return (
+        settings.AUTHOR_TIMELINE_SIZE if field == 'author'
+        else settings.GROUP_TIMELINE_SIZE
+    )
+
+
+def timeline_timeout(field):
+    return (
+        settings.AUTHOR_TIMELINE_TIMEOUT if field == 'author'
+        else settings.GROUP_TIMELINE_TIMEOUT
+    )
+
+
+def load_timeline(field, owner_id):
+    """Последние посты автора или группы из базы: [(timestamp, id), ...].
+
+    field — 'author' или 'group'.
+    """
+    posts = Post.objects.filter(**{f'{field}_id': owner_id}).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pub_date', 'pk')[:timeline_size(field)]
+    return [(pub_date.timestamp(), pk) for pub_date, pk in posts]
+
+
+def get_timelines(field, owner_ids):
+    """Списки новейших постов одним get_many, промахи — из базы."""
+    keys = {timeline_key(field, owner_id): owner_id
+            for owner_id in owner_ids}
+    timelines = cache.get_many(keys)
+    missing = {
+        key: load_timeline(field, owner_id)
+        for key, owner_id in keys.items() if key not in timelines
+    }
+    if missing:
+        cache.set_many(missing, timeline_timeout(field))
+        timelines.update(missing)
+    return [timelines[key] for key in keys]
+
+
+def get_author_timelines(author_ids):
+    return get_timelines('author', author_ids)
+
+
+def post_timelines(post):
+    return [('author', post.author_id)] + (
+        [('group', post.group_id)] if post.group_id is not None else []
+    )
+
+
+def forget_timelines(post, *group_ids):
+    """Сбрасывает списки автора и групп поста (и групп group_ids).
+
+    Списки не правятся на месте: чтение-изменение-запись без блокировки
+    теряет записи, а LocMemCache других процессов его не видит. Ключи
+    удаляются сразу и ещё раз после коммита, чтобы не остался список,
+    прочитанный из базы до появления поста; от прочих гонок страхует
+    короткий таймаут.
+    """
+    keys = [
+        timeline_key(field, owner_id)
+        for field, owner_id in post_timelines(post)
+    ] + [
+        timeline_key('group', group_id)
+        for group_id in group_ids if group_id is not None
+    ]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def hydrate(post_ids):
+    """Посты из кэша объектов (промахи — одним запросом) в порядке id."""
+    return get_posts(post_ids)
+
+
+class CachedTimeline:
+    """Лента автора или группы по закэшированному списку id.
+
+    Последовательность для Paginator: срез в пределах списка
+    собирается из кэша объектов, более глубокие страницы читаются
+    из базы через queryset. Число постов берётся из счётчика.
+    """
+
+    def __init__(self, field, owner_id, count, queryset):
+        self.timeline = get_timelines(field, [owner_id])[0]
+        self.complete = len(self.timeline) < timeline_size(field)
+        self.count = count
+        self.queryset = queryset.order_by('-pub_date', '-pk')
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        stop = self.count if index.stop is None else index.stop
+        if self.complete or stop <= len(self.timeline):
+            return hydrate([pk for _, pk in self.timeline[index]])
+        return list(self.queryset[index])
+
+
+def author_timeline(author, count):
+    return CachedTimeline(
+        'author', author.pk, count,
+        Post.objects.filter(author=author).select_related('author', 'group'),
+    )
+
+
+def group_timeline(group):
+    return CachedTimeline(
+        'group', group.pk, group.posts_count,
+        Post.objects.filter(group=group).select_related('author', 'group'),
+    )
+
+
+class MergedTimeline:
+    """Лента из k-путевого слияния списков авторов.
+
+    Ведёт себя как последовательность для Paginator: слияние идёт
+    лениво до конца запрошенного среза, посты загружаются только для
+    самого среза.
+    """
+
+    def __init__(self, timelines):
+        self._length = sum(len(timeline) for timeline in timelines)
+        self._merged = heapq.merge(*timelines, reverse=True)
+        self._prefix = []
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        stop = self._length if index.stop is None else index.stop
+        if stop > len(self._prefix):
+            self._prefix.extend(
+                islice(self._merged, stop - len(self._prefix))
+            )
+        return hydrate([pk for _, pk in self._prefix[index]])
+
+
+def pull_feed(user):
+    """Лента подписок из закэшированных списков авторов."""
+    author_ids = user.follower.values_list('author_id', flat=True)
+    return MergedTimeline(get_author_timelines(author_ids))
@@ -1,9 +1,283 @@
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 
+from core.cache import get_or_refresh
 
-def make_pagination(request, posts):
-    posts_per_page = 10
-    paginator = Paginator(posts, posts_per_page)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    return {'page_obj': page_obj}
+POSTS_PER_PAGE = 10
+PAGE_RANGE_ON_EACH_SIDE = 2
+PAGE_RANGE_ON_ENDS = 1
+
+CURSOR_NEXT = 'n'
+CURSOR_PREVIOUS = 'p'
+
+
+def encode_cursor(direction, post):
+    """Упаковывает позицию (pub_date, id) поста в непрозрачный токен."""
+    raw = f'{direction}|{post.pub_date.isoformat()}|{post.pk}'
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(cursor):
+    """Распаковывает токен курсора.
+
+    Возвращает (направление, pub_date, id) или None для пустого
+    и испорченного токена — тогда показывается первая страница.
+    """
+    try:
+        direction, pub_date, pk = force_str(
+            urlsafe_base64_decode(cursor)
+        ).split('|')
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except (TypeError, ValueError):
+        return None
+    if direction not in (CURSOR_NEXT, CURSOR_PREVIOUS) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPage(Page):
+    """Страница ленты, выбранная по курсору, а не по номеру."""
+    is_cursor = True
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        super().__init__(object_list, None, paginator)
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(Paginator):
+    """Пагинация по ключу (pub_date, id).
+
+    Вместо LIMIT/OFFSET страница выбирается условием по ключу
+    последнего (или первого) показанного поста, поэтому стоимость
+    запроса не зависит от глубины страницы. Условие на один pub_date
+    рядом с OR нужно SQLite, чтобы ограничить просмотр индекса.
+    """
+
+    def get_cursor_page(self, cursor):
+        queryset = self.object_list.order_by('-pub_date', '-pk')
+        position = decode_cursor(cursor) if cursor else None
+        if position is None:
+            return self._forward_page(queryset, has_previous=False)
+        direction, pub_date, pk = position
+        if direction == CURSOR_NEXT:
+            return self._forward_page(
+                queryset.filter(
+                    Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk),
+                    pub_date__lte=pub_date,
+                ),
+                has_previous=True,
+            )
+        return self._backward_page(
+            queryset.filter(
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__gt=pk),
+                pub_date__gte=pub_date,
+            ).reverse()
+        )
+
+    def _forward_page(self, queryset, has_previous):
+        rows = list(queryset[:self.per_page + 1])
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=(
+                encode_cursor(CURSOR_NEXT, rows[-1]) if has_next else None
+            ),
+            previous_cursor=(
+                encode_cursor(CURSOR_PREVIOUS, rows[0])
+                if has_previous and rows else None
+            ),
+        )
+
+    def _backward_page(self, queryset):
+        rows = list(queryset[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=encode_cursor(CURSOR_NEXT, rows[-1]) if rows else None,
+            previous_cursor=(
+                encode_cursor(CURSOR_PREVIOUS, rows[0])
+                if has_previous else None
+            ),
+        )
+
+
+class NoCountPage(Page):
+    """Страница, о продолжении которой известно без общего числа постов."""
+
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def __repr__(self):
+        return '<Page %s>' % self.number
+
+    def has_next(self):
+        return self._has_next
+
+
+class NoCountPaginator(Paginator):
+    """Пагинатор без SELECT COUNT(*).
+
+    Выбирает per_page + 1 строк: лишняя строка означает, что есть
+    следующая страница. Общее число постов и страниц неизвестно.
+    """
+    count = None
+    num_pages = None
+    page_range = range(0)
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def get_page(self, number):
+        try:
+            number = self.validate_number(number)
+        except (PageNotAnInteger, EmptyPage):
+            number = 1
+        try:
+            return self.page(number)
+        except EmptyPage:
+            return self.page(1)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На странице нет постов')
+        return NoCountPage(
+            rows[:self.per_page], number, self,
+            has_next=len(rows) > self.per_page,
+        )
+
+
+class CachedCountPaginator(Paginator):
+    """Пагинатор, который берёт общее число постов из готового значения.
+
+    count — число или функция без аргументов (счётчик, значение из кэша).
+    Значение может немного отставать от базы, поэтому страница по нему
+    не обрезается.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count() if callable(self._count) else self._count
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        return self._get_page(
+            self.object_list[bottom:bottom + self.per_page], number, self
+        )
+
+
+def cached_count(key, queryset):
+    """Число записей ленты из кэша, COUNT(*) — не чаще раза в таймаут."""
+    return get_or_refresh(
+        f'posts-count:{key}', queryset.count, settings.POSTS_COUNT_TIMEOUT
+    )
+
+
+def get_paginator(posts, count=None, count_key=None):
+    """Выбирает пагинатор по настройке POSTS_COUNT_MODE.
+
+    Готовый счётчик count используется всегда: он дешёвый.
+    """
+    if count is not None:
+        return CachedCountPaginator(posts, POSTS_PER_PAGE, count)
+    mode = settings.POSTS_COUNT_MODE
+    if mode == 'none':
+        return NoCountPaginator(posts, POSTS_PER_PAGE)
+    if mode == 'cached' and count_key is not None:
+        return CachedCountPaginator(
+            posts, POSTS_PER_PAGE, lambda: cached_count(count_key, posts)
+        )
+    return Paginator(posts, POSTS_PER_PAGE)
+
+
+def elided_page_range(page_obj, on_each_side=PAGE_RANGE_ON_EACH_SIDE,
+                      on_ends=PAGE_RANGE_ON_ENDS):
+    """Номера страниц для навигации: края ленты и окно вокруг текущей.
+
+    Пропуск между номерами обозначается None. Длина списка не зависит
+    от числа страниц в ленте.
+    """
+    if getattr(page_obj, 'is_cursor', False):
+        return []
+    number = page_obj.number
+    num_pages = page_obj.paginator.num_pages
+    last_is_known = num_pages is not None
+    if not last_is_known:
+        num_pages = number + 1 if page_obj.has_next() else number
+    shown = set(range(1, on_ends + 1))
+    shown.update(range(number - on_each_side, number + on_each_side + 1))
+    if last_is_known:
+        shown.update(range(num_pages - on_ends + 1, num_pages + 1))
+    page_range = []
+    previous = 0
+    for page in sorted(p for p in shown if 1 <= p <= num_pages):
+        if page - previous == 2:
+            page_range.append(previous + 1)
+        elif page - previous > 2:
+            page_range.append(None)
+        page_range.append(page)
+        previous = page
+    return page_range
+
+
+def make_pagination(request, posts, count=None, count_key=None):
+    """Разбивает ленту постов на страницы.
+
+    Если в запросе есть ?cursor= (или в настройках включён курсорный
+    режим), страница выбирается по ключу (pub_date, id); у ленты
+    из кэша (CachedTimeline) для этого берётся её queryset. Старые
+    ссылки вида ?page=N продолжают работать; как при этом считается
+    общее число постов, решает get_paginator.
+    """
+    cursor = request.GET.get('cursor')
+    queryset = getattr(posts, 'queryset', posts)
+    use_cursor = isinstance(queryset, QuerySet) and (
+        cursor is not None
+        or (settings.POSTS_PAGINATION == 'cursor'
+            and 'page' not in request.GET)
+    )
+    if use_cursor:
+        paginator = CursorPaginator(queryset, POSTS_PER_PAGE)
+        page_obj = paginator.get_cursor_page(cursor)
+    else:
+        paginator = get_paginator(posts, count, count_key)
+        page_obj = paginator.get_page(request.GET.get('page'))
+    return {
+        'page_obj': page_obj,
+        'page_range': elided_page_range(page_obj),
+    }
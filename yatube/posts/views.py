@@ -1,61 +1,101 @@
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import redirect, render
+
+from core.cache import tag_page
+from core.decorators import database_condition, query_budget
+from .cache import (
+    group_state, index_state, post_state, post_tags, profile_state,
+)
+from .counters import author_posts_count
+from .feeds import follow_feed
 from .forms import PostForm, CommentForm
-from .models import Group, Post, User, Comment, Follow
+from .models import Group, Post, User, Follow
+from .objects import cached_object_or_404
+from .timelines import author_timeline, group_timeline
 from .utils import make_pagination
 
 
+@database_condition(index_state)
+@query_budget(3)
 def index(request):
-    post_list = Post.objects.all().order_by('-pub_date')
-    context = make_pagination(request, post_list)
+    post_list = Post.objects.select_related(
+        'author', 'group'
+    ).order_by('-pub_date')
+    context = make_pagination(request, post_list, count_key='index')
+    tag_page(request, 'posts', lambda: post_tags(context['page_obj']))
     return render(request, 'posts/index.html', context)
 
 
+@database_condition(group_state)
+@query_budget(4)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    group = cached_object_or_404(Group, slug=slug)
+    posts = group_timeline(group)
     context = {
         'group': group,
         'posts': posts,
     }
-    context.update(make_pagination(request, posts))
+    context.update(make_pagination(request, posts, count=group.posts_count))
+    tag_page(
+        request, f'group:{group.pk}', f'group-info:{group.pk}',
+        lambda: post_tags(context['page_obj']),
+    )
     return render(request, 'posts/group_list.html', context)
 
 
+@database_condition(profile_state)
+@query_budget(4)
 def profile(request, username):
-    user = get_object_or_404(User, username=username)
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = cached_object_or_404(
+        User.objects.select_related('profile'), username=username
+    )
+    posts_count = author_posts_count(author)
+    posts = author_timeline(author, posts_count)
     following = False
-    if (request.user != user
+    if (request.user != author
             and request.user.is_authenticated
             and Follow.objects.filter(
                 user=request.user,
-                author=user,).exists()):
+                author=author,).exists()):
         following = True
     context = {
         'author': author,
         'following': following,
+        'posts_count': posts_count,
     }
-    context.update(make_pagination(request, posts))
+    context.update(make_pagination(request, posts, count=posts_count))
+    tag_page(
+        request, f'author:{author.pk}', f'user:{author.pk}',
+        lambda: post_tags(context['page_obj']),
+    )
     return render(request, 'posts/profile.html', context)
 
 
+@database_condition(post_state)
+@query_budget(3)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = cached_object_or_404(
+        Post.objects.select_related('author__profile', 'group'), pk=post_id
+    )
     form = CommentForm()
-    comment = Comment.objects.filter(post=post)
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
         'form': form,
-        'comment': comment,
+        'comments': comments,
+        'author_posts_count': author_posts_count(post.author),
     }
+    tag_page(
+        request, f'author:{post.author_id}',
+        lambda: post_tags([post]),
+        lambda: {f'user:{comment.author_id}' for comment in comments},
+    )
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
@@ -69,8 +109,8 @@ def post_create(request):
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
+    post = cached_object_or_404(Post, pk=post_id)
+    if post.author_id != request.user.pk:
         return redirect('posts:post_detail', post_id)
     form = PostForm(
         request.POST or None,
@@ -90,7 +130,7 @@ def post_edit(request, post_id):
 
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = cached_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -101,15 +141,18 @@ def add_comment(request, post_id):
 
 
 @login_required
+@query_budget(5)
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    context = make_pagination(request, posts)
+    posts = follow_feed(request.user)
+    context = make_pagination(
+        request, posts, count_key=f'follow:{request.user.pk}'
+    )
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = cached_object_or_404(User, username=username)
     if author != request.user:
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect('posts:follow_index')
@@ -117,6 +160,6 @@ def profile_follow(request, username):
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = cached_object_or_404(User, username=username)
     Follow.objects.get(user=request.user, author=author).delete()
     return redirect('posts:follow_index')
@@ -0,0 +1,121 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from time import perf_counter
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.db import connections
+from django.db.models import Count
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import get_resolver, reverse
+
+from .models import Group, User
+
+TEMPLATES = (
+    'posts/index.html',
+    'posts/group_list.html',
+    'posts/profile.html',
+    'posts/post_detail.html',
+    'includes/post_card.html',
+    'includes/paginator.html',
+    'core/404.html',
+)
+
+
+def warm_targets(pages, groups, profiles):
+    """Адреса для прогрева: первые страницы главной, крупные группы и
+    профили с наибольшим числом подписчиков."""
+    index = reverse('posts:index')
+    # Кэш страниц различает адреса по get_full_path: первая страница
+    # главной открывается как /, а не /?page=1.
+    urls = [index][:pages] + [
+        f'{index}?page={page}' for page in range(2, pages + 1)
+    ]
+    urls += [
+        reverse('posts:group_list', args=[slug])
+        for slug in Group.objects.order_by('-posts_count')
+        .values_list('slug', flat=True)[:groups]
+    ]
+    urls += [
+        reverse('posts:profile', args=[username])
+        for username in User.objects.annotate(
+            followers=Count('following')
+        ).order_by('-followers').values_list('username', flat=True)[:profiles]
+    ]
+    return urls
+
+
+def prime_templates():
+    """Компилирует шаблоны, чтобы первый запрос не ждал загрузчик."""
+    for name in TEMPLATES:
+        get_template(name)
+
+
+def prime_urls():
+    """Заполняет кэш resolver'а до первого запроса."""
+    get_resolver().resolve(reverse('posts:index'))
+
+
+def warm_host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host[0] not in '.*':
+            return host
+    return 'localhost'
+
+
+def warm_handler():
+    """Обработчик со всем стеком middleware, как у WSGI-приложения."""
+    handler = BaseHandler()
+    handler.load_middleware()
+    return handler
+
+
+def fetch(handler, url):
+    """Запрос анонима через весь стек middleware: (url, код, секунды).
+
+    Не тестовый Client: его обработчик на время запроса отключает
+    close_old_connections от сигналов для всего процесса, а прогрев
+    идёт рядом с живыми запросами.
+    """
+    started = perf_counter()
+    request = RequestFactory(HTTP_HOST=warm_host()).get(url)
+    try:
+        response = handler.get_response(request)
+        response.close()
+    finally:
+        connections.close_all()
+    return url, response.status_code, perf_counter() - started
+
+
+def warm_caches(pages=3, groups=10, profiles=10, workers=4):
+    """Прогревает кэши текущего процесса и возвращает время по адресам.
+
+    LocMemCache у каждого процесса свой, поэтому прогревать нужно
+    в самом рабочем процессе (WARM_CACHES_ON_STARTUP) или при общем
+    бэкенде кэша.
+    """
+    prime_templates()
+    prime_urls()
+    urls = warm_targets(pages, groups, profiles)
+    handler = warm_handler()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(fetch, handler), urls))
+
+
+def warm_from_settings():
+    try:
+        return warm_caches(
+            pages=settings.WARM_CACHES_PAGES,
+            groups=settings.WARM_CACHES_GROUPS,
+            profiles=settings.WARM_CACHES_PROFILES,
+            workers=settings.WARM_CACHES_WORKERS,
+        )
+    finally:
+        connections.close_all()
+
+
+def warm_in_background():
+    """Прогрев при старте рабочего процесса, не задерживая его запуск."""
+    threading.Thread(target=warm_from_settings, daemon=True).start()
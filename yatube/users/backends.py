@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from posts import objects
+from posts.models import User
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша объектов.
+
+    Запись сбрасывается при сохранении пользователя (смена пароля,
+    обновление last_login) и при выходе — см. posts.signals. Сброс
+    виден другим процессам только при общем кэше, поэтому без
+    SHARED_CACHE пользователь читается из базы, как в ModelBackend.
+    """
+
+    def get_user(self, user_id):
+        if not settings.SHARED_CACHE:
+            return super().get_user(user_id)
+        user = objects.get_many(User, [user_id]).get(user_id)
+        if user is not None and self.user_can_authenticate(user):
+            return user
+        return None
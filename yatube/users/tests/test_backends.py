@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import User
+from posts.objects import object_key
+
+
+@override_settings(
+    SHARED_CACHE=True,
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+)
+class CachedSessionTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.url = reverse('about:author')
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='cached', password='old-password'
+        )
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+
+    def test_logged_in_request_without_queries(self):
+        """Сессия и пользователь читаются из кэша без SQL."""
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Пользователь: cached')
+
+    def test_user_save_refreshes_cached_user(self):
+        """Сохранение пользователя сбрасывает его запись в кэше."""
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertContains(self.client.get(self.url), 'Пользователь: renamed')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """После смены пароля старая сессия перестаёт действовать."""
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_forgets_cached_user(self):
+        """Выход убирает пользователя из кэша."""
+        self.client.get(reverse('users:logout'))
+        self.assertIsNone(cache.get(object_key(User, self.user.pk)))
+
+    def test_benchmark_command(self):
+        """bench_sessions показывает меньше запросов с кэшем."""
+        output = StringIO()
+        call_command('bench_sessions', requests=2, stdout=output)
+        database, cached = output.getvalue().splitlines()
+        self.assertTrue(database.startswith('база: 2.0'))
+        self.assertTrue(cached.startswith('кэш: 0.0'))
+
+    @override_settings(SHARED_CACHE=False)
+    def test_local_cache_reads_user_from_database(self):
+        """Без общего кэша изменения из других процессов видны сразу."""
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        response = self.client.get(self.url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_model_backend_sessions_stay_valid(self):
+        """Сессии, выданные через ModelBackend, не сбрасываются."""
+        self.client.force_login(
+            self.user, backend='django.contrib.auth.backends.ModelBackend'
+        )
+        response = self.client.get(self.url)
+        self.assertTrue(response.context['user'].is_authenticated)
@@ -50,13 +50,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.DegradedModeMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ConditionalPageMiddleware',
+    'core.middleware.PageCacheMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
@@ -91,6 +95,19 @@ DATABASES = {
     }
 }
 
+# Боевой режим SQLite: WAL вместо журнала отката, прагмы на каждое
+# соединение и постоянные соединения. Включается SQLITE_PRODUCTION=1.
+SQLITE_PRODUCTION = os.getenv('SQLITE_PRODUCTION') == '1'
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+}
+if SQLITE_PRODUCTION:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -131,6 +148,7 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
@@ -142,8 +160,150 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Миниатюры новых картинок создаются в фоне (posts.thumbnails) этим числом
+# потоков на процесс; уже загруженные — командой generate_thumbnails.
+THUMBNAIL_WORKERS = 2
+# Записи sorl о миниатюрах хранятся в кэше с копией в базе; карточки ленты
+# загружают их для всей страницы одним get_many (posts.thumbnails.prefetched).
+THUMBNAIL_KVSTORE = 'posts.thumbnails.PrefetchingKVStore'
+
+# Кэш в памяти процесса, ограниченный по байтам (LRU), со сжатием больших
+# фрагментов. Счётчики попаданий и вытеснений — на /cache-stats/ (для staff).
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache_backends.BoundedLocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'MAX_BYTES': 64 * 1024 * 1024,
+            'COMPRESS_MIN_LENGTH': 16 * 1024,
+        },
     }
 }
+# Общий ли кэш у рабочих процессов. Запись в LocMemCache видит только
+# записавший процесс, поэтому то, что другие процессы не должны
+# пропустить (версии меток для ETag), включается только при общем кэше.
+SHARED_CACHE = CACHES['default']['BACKEND'] not in (
+    'core.cache_backends.BoundedLocMemCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# Без общего кэша записи, которые сбрасываются при изменениях в базе,
+# у других процессов живут не дольше этого (core.cache.local_timeout).
+LOCAL_CACHE_TIMEOUT = 60
+
+# При общем кэше сессия и пользователь сессии читаются из кэша: на запрос
+# вошедшего пользователя не уходит ни одного SQL-запроса до view. С кэшем
+# в памяти процесса другие процессы не узнали бы о выходе или смене
+# пароля, поэтому сессии хранятся в базе, а CachedModelBackend читает
+# пользователя из базы. ModelBackend оставлен для уже выданных сессий.
+if SHARED_CACHE:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+# Режим пагинации лент: 'page' — ?page=N, 'cursor' — по ключу (pub_date, id).
+# Ссылки ?page=N работают в обоих режимах.
+POSTS_PAGINATION = 'page'
+
+# Как считать общее число постов ленты: 'exact' — COUNT(*) на каждый запрос,
+# 'cached' — COUNT(*) из кэша раз в POSTS_COUNT_TIMEOUT секунд,
+# 'none' — без подсчёта, только ссылка на следующую страницу.
+POSTS_COUNT_MODE = 'exact'
+POSTS_COUNT_TIMEOUT = 60
+
+# Движок ленты подписок: 'orm' — JOIN постов с подписками на каждый запрос,
+# 'fanout' — материализованная лента FeedItem, заполняемая при публикации,
+# 'pull' — слияние закэшированных списков последних постов авторов
+# (глубина ленты ограничена AUTHOR_TIMELINE_SIZE постами на автора).
+# После переключения на 'fanout' ленты заполняет rebuild_follow_feeds.
+FOLLOW_FEED_ENGINE = 'fanout'
+# Посты авторов с большим числом подписчиков не раскладываются по лентам.
+FOLLOW_FEED_FANOUT_LIMIT = 10000
+# Сколько последних постов автора добавить в ленту при подписке.
+FOLLOW_FEED_BACKFILL = 200
+FOLLOW_FEED_BATCH_SIZE = 1000
+FOLLOW_FEED_PULLED_TIMEOUT = 300
+
+# Сколько последних постов автора хранится в его списке в кэше.
+# Запись поста удаляет список, а не правит его, поэтому таймаут короткий:
+# он ограничивает, сколько другой процесс видит список без нового поста.
+AUTHOR_TIMELINE_SIZE = 200
+AUTHOR_TIMELINE_TIMEOUT = 60
+# То же для групп. Профиль и группа отдают страницы в пределах этих
+# списков из кэша, более глубокие — запросом к базе.
+GROUP_TIMELINE_SIZE = 200
+GROUP_TIMELINE_TIMEOUT = 60
+
+# Карточки постов кэшируются по (id, updated, версии автора и группы):
+# правка даёт новый ключ, старая карточка просто доживает до таймаута.
+# Без SHARED_CACHE версии автора и группы у каждого процесса свои,
+# и карточка хранится не дольше LOCAL_CACHE_TIMEOUT.
+POST_CARD_TIMEOUT = 60 * 60 * 24
+
+# Кэш строк Post, User и Group по pk, username и slug (posts.objects).
+# Записи удаляются сигналами и при изменении счётчиков; без SHARED_CACHE
+# другие процессы хранят их не дольше LOCAL_CACHE_TIMEOUT.
+OBJECT_CACHE_TIMEOUT = 60 * 60
+# Сколько помнить, что поста, пользователя или группы нет: защищает базу
+# от перебора адресов. Отметка снимается при создании такого объекта.
+NEGATIVE_CACHE_TIMEOUT = 60
+
+# Прогрев кэшей (posts.warmup): первые страницы главной, крупнейшие группы
+# и профили с наибольшим числом подписчиков. LocMemCache у каждого процесса
+# свой, поэтому при WARM_CACHES_ON_STARTUP рабочий процесс прогревает себя
+# сам в фоновом потоке после загрузки wsgi.py.
+WARM_CACHES_ON_STARTUP = False
+WARM_CACHES_PAGES = 3
+WARM_CACHES_GROUPS = 10
+WARM_CACHES_PROFILES = 10
+WARM_CACHES_WORKERS = 4
+
+# Защита от одновременного пересчёта ключей кэша (core.cache.get_or_refresh):
+# пересчитывает один запрос под блокировкой на CACHE_LOCK_TIMEOUT секунд,
+# остальные до CACHE_STALE_TIMEOUT секунд после срока отдают старое значение.
+# CACHE_EARLY_REFRESH_BETA > 1 — обновлять раньше, 0 — только по сроку.
+CACHE_LOCK_TIMEOUT = 10
+CACHE_STALE_TIMEOUT = 60
+CACHE_EARLY_REFRESH_BETA = 1.0
+
+# Кэш целых страниц для анонимов (core.middleware.PageCacheMiddleware).
+# Страница сбрасывается по версиям меток постов, авторов и групп на ней;
+# таймаут лишь страхует от гонки записи с рендером. Без SHARED_CACHE
+# версии видит только записавший процесс, и таймаут у страницы меньше:
+# LOCAL_CACHE_TIMEOUT.
+PAGE_CACHE_ENABLED = True
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Условные GET (core.middleware.ConditionalPageMiddleware): ETag страницы
+# считается по версиям её меток, которые хранятся PAGE_TAGS_TIMEOUT секунд.
+# Только при SHARED_CACHE: иначе процесс, не видевший записи, отвечал бы
+# 304 до истечения таймаута. Без общего кэша ETag и Last-Modified лент
+# и постов строятся по базе (core.decorators.database_condition).
+PAGE_TAGS_TIMEOUT = 60 * 60
+# Cache-Control по имени URL; для вошедших пользователей public
+# заменяется на private. Ленты браузер и прокси перепроверяют при каждом
+# показе, получая 304, пока ETag не изменился.
+REVALIDATE = {'public': True, 'max_age': 0, 'must_revalidate': True}
+CACHE_CONTROL_POLICIES = {
+    'posts:index': REVALIDATE,
+    'posts:group_list': REVALIDATE,
+    'posts:profile': REVALIDATE,
+    'posts:post_detail': REVALIDATE,
+    'posts:follow_index': {'private': True, 'no_cache': True},
+    'posts:post_create': {'private': True, 'no_store': True},
+    'posts:post_edit': {'private': True, 'no_store': True},
+}
+
+# Режим деградации (core.middleware.DegradedModeMiddleware): запрос к базе
+# дольше DEGRADED_DB_LATENCY секунд или OperationalError включают его на
+# DEGRADED_MODE_DURATION секунд. Ленты и посты тогда отдаются из последней
+# удачной копии (хранится STALE_PAGE_TIMEOUT секунд), запись отклоняется 503.
+DEGRADED_DB_LATENCY = 2
+DEGRADED_MODE_DURATION = 30
+STALE_PAGE_TIMEOUT = 60 * 60 * 24
+
+# Доля запросов, для которых считается Server-Timing и пишется строка
+# в лог yatube.timing (уровень INFO).
+SERVER_TIMING_SAMPLE_RATE = 0.05